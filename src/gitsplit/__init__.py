@@ -5,8 +5,15 @@ Transform messy git branches into clean, atomic PRs using AI.
 
 __version__ = "0.1.0"
 
-from gitsplit.engine import SplitEngine, create_engine
-from gitsplit.models import Session, Intent, ChangePlan
+# Public names are resolved lazily (PEP 562) so importing a submodule such
+# as gitsplit.cli does not drag in the engine and its HTTP stack.
+_LAZY_ATTRS = {
+    "SplitEngine": "gitsplit.engine",
+    "create_engine": "gitsplit.engine",
+    "Session": "gitsplit.models",
+    "Intent": "gitsplit.models",
+    "ChangePlan": "gitsplit.models",
+}
 
 __all__ = [
     "__version__",
@@ -16,3 +23,15 @@ __all__ = [
     "Intent",
     "ChangePlan",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'gitsplit' has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
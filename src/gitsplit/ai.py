@@ -2,11 +2,16 @@
 
 import json
 import os
+import re
+import threading
 from dataclasses import dataclass
 from enum import Enum
+from typing import Any, Callable
 
 import httpx
 
+from gitsplit.ai_cache import LLMResponseCache, make_cache_key
+
 
 class ModelTier(str, Enum):
     """AI model tiers for escalation."""
@@ -29,6 +34,10 @@ MODEL_COSTS = {
     "anthropic/claude-3.5-sonnet": {"input": 3.00, "output": 15.00},
 }
 
+# Matches ```json ... ``` or ``` ... ``` fenced blocks in model output
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*\n(.*?)\n```", re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
+
 
 @dataclass
 class AIResponse:
@@ -71,6 +80,9 @@ class AIClient:
         api_key: str | None = None,
         model_override: str | None = None,
         max_cost: float | None = None,
+        use_cache: bool = True,
+        conversation_history_threshold: int = 6,
+        max_history: int = 32,
     ):
         self.api_key = api_key or os.environ.get("OPENROUTER_API_KEY")
         if not self.api_key:
@@ -83,26 +95,87 @@ class AIClient:
         self.max_cost = max_cost
         self.usage = TokenUsage()
         self.current_tier = ModelTier.TIER1_FAST
+        self.cache = LLMResponseCache() if use_cache else None
+        # Long self-healing histories drift; past this many messages the cache
+        # is neither read nor written.
+        self.conversation_history_threshold = conversation_history_threshold
 
         self.base_url = "https://openrouter.ai/api/v1"
-        self.client = httpx.Client(timeout=120.0)
-
-        # Conversation history for multi-turn interactions
+        # Keep connections alive across the multi-turn conversation so retries
+        # and later phases reuse the TLS session instead of re-handshaking.
+        self.client = httpx.Client(
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=100,
+                keepalive_expiry=30.0,
+            ),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "HTTP-Referer": "https://github.com/gitsplit",
+                "X-Title": "gitsplit",
+                "Content-Type": "application/json",
+            },
+        )
+
+        # Open the pooled connection in the background while the diff is read
+        self._prewarm_thread: threading.Thread | None = threading.Thread(
+            target=self._prewarm, daemon=True
+        )
+        self._prewarm_thread.start()
+
+        # Characters sent vs. prompt tokens billed, used to calibrate the
+        # chars-per-token ratio for budget estimates
+        self._prompt_chars_sent = 0
+        self._prompt_tokens_billed = 0
+
+        # (sum of completion tokens, response count) per model, used to
+        # estimate output size instead of assuming half of max_tokens
+        self._output_tokens_by_model: dict[str, tuple[int, int]] = {}
+
+        # Conversation history for multi-turn interactions, with a running
+        # total of its content length for budget estimates
         self._conversation_history: list[dict[str, str]] = []
+        self._history_char_count = 0
         self._current_system: str | None = None
+        # Cap on history length so self-healing retries don't re-upload an
+        # ever-growing error chain
+        self.max_history = max_history
+
+    def _prewarm(self) -> None:
+        """Establish the TLS connection ahead of the first request."""
+        try:
+            self.client.head(f"{self.base_url}/models", timeout=5.0)
+        except Exception:
+            # Best effort only; this also covers httpx's RuntimeError when
+            # close() shuts the client while the request is in flight
+            pass
 
     def reset_conversation(self, system: str | None = None) -> None:
         """Reset conversation history, optionally setting a new system prompt."""
         self._conversation_history = []
+        self._history_char_count = 0
         self._current_system = system
 
+    def _append_history(self, message: dict[str, str]) -> None:
+        """Append a message to the conversation history."""
+        self._conversation_history.append(message)
+        self._history_char_count += len(message.get("content", ""))
+
+        # Evict the oldest exchanges but keep the opening prompt, which
+        # carries the diff every later turn refers to
+        while len(self._conversation_history) > max(self.max_history, 3):
+            for evicted in self._conversation_history[1:3]:
+                self._history_char_count -= len(evicted.get("content", ""))
+            del self._conversation_history[1:3]
+
     def add_user_message(self, content: str) -> None:
         """Add a user message to the conversation history."""
-        self._conversation_history.append({"role": "user", "content": content})
+        self._append_history({"role": "user", "content": content})
 
     def add_assistant_message(self, content: str) -> None:
         """Add an assistant message to the conversation history."""
-        self._conversation_history.append({"role": "assistant", "content": content})
+        self._append_history({"role": "assistant", "content": content})
 
     def add_error_context(self, error: str, diagnosis: str | None = None) -> None:
         """Add error context for self-healing retry."""
@@ -127,6 +200,19 @@ class AIClient:
         costs = MODEL_COSTS.get(model, {"input": 3.0, "output": 15.0})
         return (input_tokens * costs["input"] + output_tokens * costs["output"]) / 1_000_000
 
+    def _estimate_tokens(self, text_len: int) -> int:
+        """Estimate prompt tokens for a text length using the observed ratio."""
+        if self._prompt_tokens_billed:
+            return text_len * self._prompt_tokens_billed // self._prompt_chars_sent
+        return text_len // 4  # rough approximation until the first response
+
+    def _estimate_output_tokens(self, model: str, max_tokens: int) -> int:
+        """Estimate completion tokens from past responses of the same model."""
+        total, count = self._output_tokens_by_model.get(model, (0, 0))
+        if count:
+            return min(total // count, max_tokens)
+        return max_tokens // 2
+
     def _check_budget(self, estimated_cost: float) -> None:
         """Check if request would exceed budget."""
         if self.max_cost is not None:
@@ -163,6 +249,7 @@ class AIClient:
         temperature: float = 0.0,
         max_tokens: int = 4096,
         use_conversation: bool = False,
+        validate: Callable[[str], Any] | None = None,
     ) -> AIResponse:
         """
         Complete a chat conversation.
@@ -173,6 +260,8 @@ class AIClient:
             temperature: Sampling temperature.
             max_tokens: Maximum tokens in response.
             use_conversation: If True, use and update conversation history.
+            validate: Checks the content, raising AIError if it is unusable.
+                Only content that passes is cached or served from the cache.
 
         Returns:
             AIResponse with the model's response.
@@ -184,42 +273,82 @@ class AIClient:
             # Add new messages to history
             if messages:
                 for msg in messages:
-                    self._conversation_history.append(msg)
-            request_messages = list(self._conversation_history)
+                    self._append_history(msg)
+            request_messages = self._conversation_history
             system = system or self._current_system
+            text_len = self._history_char_count
         else:
             request_messages = messages or []
+            text_len = sum(len(m.get("content", "")) for m in request_messages)
+
+        # Build final message list with system prompt
+        system_messages = [{"role": "system", "content": system}] if system else []
+        final_messages = system_messages + request_messages
+
+        # Deterministic requests can be served from the on-disk cache, first by
+        # exact match and then by a key that ignores whitespace/blob-id noise
+        skip_cache = (
+            use_conversation
+            and len(self._conversation_history) > self.conversation_history_threshold
+        )
+        cache_keys: list[str] = []
+        if self.cache is not None and temperature == 0.0 and not skip_cache:
+            cache_keys = [
+                make_cache_key(model, system, final_messages, temperature, max_tokens),
+                make_cache_key(
+                    model, system, final_messages, temperature, max_tokens, normalize=True
+                ),
+            ]
+        for cache_key in cache_keys:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                content = self._extract_content(cached)
+                if not self._is_valid(content, validate):
+                    # Replaying a bad reply would fail every retry the same way
+                    self.cache.delete(cache_key)
+                    continue
+                if use_conversation:
+                    self.add_assistant_message(content)
+                return AIResponse(
+                    content=content,
+                    model=model,
+                    input_tokens=0,
+                    output_tokens=0,
+                    cost=0.0,
+                    raw_response=cached,
+                )
 
         # Rough token estimation for budget check
-        text_len = sum(len(m.get("content", "")) for m in request_messages)
         if system:
             text_len += len(system)
-        estimated_input = text_len // 4  # rough approximation
-        estimated_output = max_tokens // 2
+        estimated_input = self._estimate_tokens(text_len)
+        estimated_output = self._estimate_output_tokens(model, max_tokens)
         estimated_cost = self._estimate_cost(model, estimated_input, estimated_output)
 
         self._check_budget(estimated_cost)
 
-        # Build final message list with system prompt
-        final_messages = []
-        if system:
-            final_messages.append({"role": "system", "content": system})
-        final_messages.extend(request_messages)
+        # Let an in-flight pre-warm finish so this request reuses its connection
+        if self._prewarm_thread is not None:
+            self._prewarm_thread.join()
+            self._prewarm_thread = None
+
+        # Encode compactly as UTF-8 ourselves; diffs are the bulk of the payload
+        # and ASCII-escaping or padded separators would inflate them.
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": final_messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
 
         try:
             response = self.client.post(
                 f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": "https://github.com/gitsplit",
-                    "X-Title": "gitsplit",
-                },
-                json={
-                    "model": model,
-                    "messages": final_messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                },
+                content=payload,
             )
 
             if response.status_code != 200:
@@ -232,11 +361,15 @@ class AIClient:
             input_tokens = usage.get("prompt_tokens", 0)
             output_tokens = usage.get("completion_tokens", 0)
             actual_cost = self._estimate_cost(model, input_tokens, output_tokens)
+            if input_tokens and text_len:
+                self._prompt_chars_sent += text_len
+                self._prompt_tokens_billed += input_tokens
+            if output_tokens:
+                total, count = self._output_tokens_by_model.get(model, (0, 0))
+                self._output_tokens_by_model[model] = (total + output_tokens, count + 1)
 
             # Extract content
-            content = ""
-            if data.get("choices"):
-                content = data["choices"][0].get("message", {}).get("content", "")
+            content = self._extract_content(data)
 
             result = AIResponse(
                 content=content,
@@ -249,19 +382,51 @@ class AIClient:
 
             self.usage.add(result)
 
+            if self._is_valid(content, validate):
+                for cache_key in cache_keys:
+                    self.cache.put(cache_key, data)
+
             # Add assistant response to conversation history if using conversation
             if use_conversation:
-                self._conversation_history.append({"role": "assistant", "content": content})
+                self.add_assistant_message(content)
 
             return result
 
         except httpx.RequestError as e:
             raise AIError(f"Network error: {e}")
 
+    def _is_valid(self, content: str, validate: Callable[[str], Any] | None) -> bool:
+        """Whether content is non-empty and passes the caller's validator."""
+        if not content:
+            return False
+        if validate is None:
+            return True
+        try:
+            validate(content)
+        except AIError:
+            return False
+        return True
+
+    def _extract_content(self, data: dict) -> str:
+        """Extract the assistant message content from an API response."""
+        if data.get("choices"):
+            return data["choices"][0].get("message", {}).get("content", "")
+        return ""
+
     def close(self) -> None:
         """Close the client."""
+        # Give a still-running pre-warm a moment to finish before the pool closes
+        if self._prewarm_thread is not None:
+            self._prewarm_thread.join(timeout=1.0)
+            self._prewarm_thread = None
         self.client.close()
 
+    def __enter__(self) -> "AIClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
 
 # Prompt templates for different phases
 
@@ -342,34 +507,19 @@ def parse_json_response(content: str) -> dict:
     content = content.strip()
 
     # Try to find JSON in markdown code block first
-    if "```json" in content or "```" in content:
-        import re
-        # Match ```json ... ``` or ``` ... ```
-        match = re.search(r"```(?:json)?\s*\n(.*?)\n```", content, re.DOTALL)
+    if "```" in content:
+        match = _JSON_FENCE_RE.search(content)
         if match:
             content = match.group(1).strip()
 
-    # If content doesn't start with {, try to find JSON object
-    if not content.startswith("{"):
-        # Find first { and last }
-        start_idx = content.find("{")
-        if start_idx != -1:
-            # Find the matching closing brace
-            brace_count = 0
-            end_idx = -1
-            for i, char in enumerate(content[start_idx:], start_idx):
-                if char == "{":
-                    brace_count += 1
-                elif char == "}":
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i + 1
-                        break
-
-            if end_idx > start_idx:
-                content = content[start_idx:end_idx]
+    # Decode the first complete JSON value, skipping any preamble text and
+    # ignoring trailing commentary. raw_decode handles braces inside strings.
+    start_idx = max(content.find("{"), 0)
 
     try:
-        return json.loads(content)
+        result, _ = _JSON_DECODER.raw_decode(content, start_idx)
     except json.JSONDecodeError as e:
-        raise AIError(f"Failed to parse AI response as JSON: {e}\nContent: {content[:500]}")
+        raise AIError(
+            f"Failed to parse AI response as JSON: {e}\nContent: {content[start_idx:][:500]}"
+        )
+    return result
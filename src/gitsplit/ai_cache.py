@@ -0,0 +1,122 @@
+"""On-disk cache for deterministic AI completions."""
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+
+CACHE_DIR = Path.home() / ".gitsplit" / "cache" / "llm"
+
+# Bounds enforced once per process, on the first write
+_MAX_ENTRY_AGE_SECONDS = 30 * 24 * 3600
+_MAX_ENTRIES = 2000
+
+# Diff noise that does not affect line numbering: blob ids and trailing whitespace
+_INDEX_LINE_RE = re.compile(r"^index [0-9a-f]+\.\.[0-9a-f]+.*\n", re.MULTILINE)
+_TRAILING_WS_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+
+
+def normalize_content(text: str) -> str:
+    """Strip diff noise so near-identical prompts share a cache key."""
+    text = _INDEX_LINE_RE.sub("", text)
+    return _TRAILING_WS_RE.sub("", text)
+
+
+def make_cache_key(
+    model: str,
+    system: str | None,
+    messages: list[dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    normalize: bool = False,
+) -> str:
+    """
+    Build a stable key for a completion request.
+
+    With normalize=True, message contents are passed through normalize_content
+    first. Line numbers are unaffected, so a cached plan stays valid.
+    """
+    if normalize:
+        messages = [
+            {**m, "content": normalize_content(m.get("content", ""))} for m in messages
+        ]
+    payload = json.dumps(
+        {
+            "m": model,
+            "s": system,
+            "ms": messages,
+            "t": temperature,
+            "mt": max_tokens,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """Exact-match cache of raw API responses, one JSON file per request key."""
+
+    def __init__(self, cache_dir: Path | None = None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self._pruned = False
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached API response for a key, if any."""
+        path = self._path_for(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return None
+
+    def put(self, key: str, data: dict[str, Any]) -> None:
+        """Store an API response under a key."""
+        if not self._pruned:
+            self._pruned = True
+            self.prune()
+
+        path = self._path_for(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f)
+        except OSError:
+            pass
+
+    def delete(self, key: str) -> None:
+        """Drop the entry for a key, if any."""
+        try:
+            self._path_for(key).unlink()
+        except OSError:
+            pass
+
+    def prune(self) -> None:
+        """Remove entries past the age limit, then the oldest beyond the count limit."""
+        entries: list[tuple[float, Path]] = []
+        cutoff = time.time() - _MAX_ENTRY_AGE_SECONDS
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                mtime = os.stat(path).st_mtime
+                if mtime < cutoff:
+                    path.unlink()
+                else:
+                    entries.append((mtime, path))
+            except OSError:
+                continue
+
+        entries.sort()
+        for _, path in entries[: max(len(entries) - _MAX_ENTRIES, 0)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
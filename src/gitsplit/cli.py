@@ -1,6 +1,9 @@
 """CLI for gitsplit."""
 
+import json
 import sys
+from contextlib import closing
+from typing import TYPE_CHECKING
 
 import rich_click as click
 from rich.console import Console
@@ -19,16 +22,12 @@ click.rich_click.STYLE_OPTION = "bold cyan"
 click.rich_click.STYLE_ARGUMENT = "bold cyan"
 click.rich_click.STYLE_COMMAND = "bold green"
 click.rich_click.STYLE_SWITCH = "bold yellow"
-from gitsplit.engine import create_engine, EngineError
-from gitsplit.git import GitOperations, GitError
-from gitsplit.models import Session, SessionPhase
-from gitsplit.session import (
-    generate_session_id,
-    find_latest_session,
-    load_session,
-    list_sessions,
-    save_session,
-)
+
+# Engine, git and session modules are imported inside the commands that use
+# them so `--help` and `version` don't pay for httpx/gitpython at startup.
+if TYPE_CHECKING:
+    from gitsplit.git import GitOperations
+    from gitsplit.models import Session
 
 
 console = Console()
@@ -88,6 +87,21 @@ console = Console()
     help="Override the AI model via OpenRouter. Defaults to a fast model, "
          "escalating to stronger models on retry failures."
 )
+@click.option(
+    "--no-cache", is_flag=True,
+    help="Always call the AI model instead of reusing cached responses. "
+         "Deterministic responses are cached under ~/.gitsplit/cache by default."
+)
+@click.option(
+    "--cache-history-threshold", default=6, metavar="N", show_default=True,
+    help="Bypass the response cache once the AI conversation exceeds N messages, "
+         "so long self-healing retry chains never reuse a stale answer."
+)
+@click.option(
+    "--max-history", default=32, metavar="N", show_default=True,
+    help="Keep at most N messages of AI conversation history. The oldest "
+         "retry exchanges are dropped so repeated attempts don't resend them."
+)
 @click.option(
     "--no-verify", is_flag=True,
     help="Skip build/syntax verification between splits. Faster but won't "
@@ -127,6 +141,9 @@ def cli(
     max_attempts,
     max_cost,
     model,
+    no_cache,
+    cache_history_threshold,
+    max_history,
     no_verify,
     no_pr,
     progressive,
@@ -173,6 +190,11 @@ def cli(
     if ctx.invoked_subcommand is not None:
         return
 
+    from gitsplit.engine import create_engine, EngineError
+    from gitsplit.git import GitOperations, GitError
+    from gitsplit.models import Session
+    from gitsplit.session import find_latest_session, generate_session_id
+
     display.print_header()
 
     try:
@@ -218,9 +240,13 @@ def cli(
             model=model,
             max_cost=max_cost,
             session=session,
+            use_cache=not no_cache,
+            cache_history_threshold=cache_history_threshold,
+            max_history=max_history,
         )
 
-        success = engine.run()
+        with closing(engine):
+            success = engine.run()
 
         if json_output:
             _output_json(session)
@@ -232,7 +258,7 @@ def cli(
         sys.exit(1)
 
 
-def _verify_only(git: GitOperations, session: Session, diagnose: bool) -> None:
+def _verify_only(git: "GitOperations", session: "Session", diagnose: bool) -> None:
     """Verify an existing split."""
     from gitsplit.verification import Verifier
 
@@ -260,12 +286,13 @@ def _verify_only(git: GitOperations, session: Session, diagnose: bool) -> None:
     sys.exit(0 if result.passed else 1)
 
 
-def _output_json(session: Session) -> None:
+def _output_json(session: "Session") -> None:
     """Output session as JSON."""
-    import json
     from gitsplit.session import serialize_session
 
-    print(json.dumps(serialize_session(session), indent=2))
+    # Encode straight into stdout rather than building the whole string first
+    json.dump(serialize_session(session), sys.stdout, indent=2)
+    sys.stdout.write("\n")
 
 
 @cli.command()
@@ -284,6 +311,8 @@ def sessions():
         complete    Successfully finished
         failed      Stopped due to error
     """
+    from gitsplit.session import list_sessions
+
     saved = list_sessions()
 
     if not saved:
@@ -322,6 +351,9 @@ def resume_session(session_id: str):
 
         gitsplit resume-session 20240115-143022-abc123
     """
+    from gitsplit.engine import create_engine, EngineError
+    from gitsplit.session import load_session
+
     session = load_session(session_id)
 
     if session is None:
@@ -333,7 +365,8 @@ def resume_session(session_id: str):
 
     try:
         engine = create_engine(session=session)
-        success = engine.run()
+        with closing(engine):
+            success = engine.run()
         sys.exit(0 if success else 1)
 
     except EngineError as e:
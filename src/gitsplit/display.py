@@ -1,23 +1,83 @@
 """Rich terminal display for gitsplit."""
 
-from rich.console import Console
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.table import Table
+import string
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from rich.console import Console, Group, RenderableType
 from rich.text import Text
-from rich.prompt import Confirm, Prompt
+
+# Only Console is needed at import time; panels, tables, progress and prompts
+# are imported by the helpers that render them.
+if TYPE_CHECKING:
+    from rich.progress import Progress
+    from rich.table import Table
 
 from gitsplit.models import Intent, ChangePlan, VerificationResult, Session
 
 
 console = Console()
 
+# Redirected output (CI logs, pipes) gets plain text without Rich rendering
+_IS_TTY = console.is_terminal
+
+_LABELS = string.ascii_uppercase
+
+_STATUS_COLORS = {
+    "creating": "yellow",
+    "applying": "yellow",
+    "verifying": "yellow",
+    "pushing": "yellow",
+    "done": "green",
+    "skipped": "dim",
+    "failed": "red",
+}
+
+
+def _make_file_table() -> "Table":
+    """Borderless file/changes/lines table used per intent."""
+    from rich.table import Table
+
+    table = Table(show_header=False, box=None, padding=(0, 2))
+    table.add_column("File", style="white")
+    table.add_column("Changes", style="green")
+    table.add_column("Lines", style="dim")
+    return table
+
+
+def _make_kv_table() -> "Table":
+    """Borderless two-column label/value table."""
+    from rich.table import Table
+
+    table = Table(show_header=False, box=None, padding=(0, 2))
+    table.add_column("Label")
+    table.add_column("Value")
+    return table
+
+
+@lru_cache(maxsize=16)
+def _status_color(status: str) -> str:
+    """Color for a progress status, keyed on its first word."""
+    color = _STATUS_COLORS.get(status)
+    if color is not None:
+        return color
+
+    keyword = status.split(maxsplit=1)[0].lower() if status else ""
+    return _STATUS_COLORS.get(keyword, "white")
+
+
+def _intent_label(index: int) -> str:
+    """Letter label for an intent: A..Z, then AA, AB, ..."""
+    if index < len(_LABELS):
+        return _LABELS[index]
+    return _LABELS[index // 26 - 1] + _LABELS[index % 26]
+
 
 def print_header() -> None:
     """Print the gitsplit header."""
-    console.print()
-    console.print("[bold cyan]gitsplit[/bold cyan] - Semantic Git Splitter")
-    console.print()
+    console.print("\n[bold cyan]gitsplit[/bold cyan] - Semantic Git Splitter\n")
 
 
 def print_scanning(branch: str, base: str) -> None:
@@ -31,42 +91,64 @@ def print_file_count(count: int) -> None:
     console.print(f"  Scanning [bold]{count}[/bold] files")
 
 
-def create_spinner(message: str) -> Progress:
-    """Create a spinner progress indicator."""
+@lru_cache(maxsize=1)
+def _get_spinner() -> "Progress":
+    """
+    Return the spinner shared by every phase, creating it on first use.
+
+    Call _get_spinner.cache_clear() to start over with a fresh Progress.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
     return Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console,
         transient=True,
+        auto_refresh=True,
+        refresh_per_second=8,
+        # Nothing to animate when output is piped to a file or CI log
+        disable=not console.is_terminal,
     )
 
 
+@contextmanager
+def create_spinner(message: str) -> Iterator["Progress"]:
+    """
+    Show a spinner while the block runs.
+
+    All phases share one Progress; tasks added inside the block are removed
+    on exit and the display stops once no tasks remain.
+    """
+    spinner = _get_spinner()
+    existing = set(spinner.task_ids)
+    if not existing:
+        spinner.start()
+
+    try:
+        yield spinner
+    finally:
+        for task_id in set(spinner.task_ids) - existing:
+            spinner.remove_task(task_id)
+        if not spinner.task_ids:
+            spinner.stop()
+
+
 def print_intents(intents: list[Intent], title: str = "Found intents:") -> None:
     """Print discovered intents in formatted tables."""
-    console.print()
-    console.print(f"[bold]{title}[/bold]")
-    console.print()
+    from rich.panel import Panel
 
-    for i, intent in enumerate(intents):
-        # Create table for this intent
-        table = Table(
-            show_header=True,
-            header_style="bold",
-            box=None,
-            padding=(0, 1),
-            collapse_padding=True,
-        )
+    # Collect everything and render once instead of printing line by line
+    renderables: list[RenderableType] = ["", f"[bold]{title}[/bold]", ""]
 
+    for i, intent in enumerate(intents):
         # Intent header
-        intent_label = chr(ord("A") + i)
+        intent_label = _intent_label(i)
         header = f"INTENT {intent_label}: {intent.name}"
-        console.print(Panel(header, style="cyan", width=70))
+        renderables.append(Panel(header, style="cyan", width=70))
 
         # File table
-        file_table = Table(show_header=False, box=None, padding=(0, 2))
-        file_table.add_column("File", style="white")
-        file_table.add_column("Changes", style="green")
-        file_table.add_column("Lines", style="dim")
+        file_table = _make_file_table()
 
         for file_change in intent.files:
             changes = f"+{file_change.additions} -{file_change.deletions}"
@@ -84,20 +166,26 @@ def print_intents(intents: list[Intent], title: str = "Found intents:") -> None:
 
             file_table.add_row(file_change.path, changes, lines)
 
-        console.print(file_table)
-        console.print()
+        renderables.append(file_table)
+        renderables.append("")
+
+    console.print(Group(*renderables))
 
 
 def print_pr_stack(intents: list[Intent]) -> None:
     """Print the proposed PR stack order."""
-    labels = [chr(ord("A") + i) for i in range(len(intents))]
-    stack = " -> ".join(labels)
-    console.print(f"Proposed PR stack: [bold cyan]{stack}[/bold cyan]")
-    console.print()
+    count = len(intents)
+    if count <= len(_LABELS):
+        stack = " -> ".join(_LABELS[:count])
+    else:
+        stack = " -> ".join(_intent_label(i) for i in range(count))
+    console.print(f"Proposed PR stack: [bold cyan]{stack}[/bold cyan]\n")
 
 
 def prompt_proceed() -> str:
     """Prompt user to proceed with split."""
+    from rich.prompt import Prompt
+
     return Prompt.ask(
         "Proceed with this split?",
         choices=["y", "n", "e"],
@@ -107,91 +195,168 @@ def prompt_proceed() -> str:
 
 def prompt_confirm(message: str, default: bool = True) -> bool:
     """Simple yes/no confirmation."""
+    from rich.prompt import Confirm
+
     return Confirm.ask(message, default=default)
 
 
 def prompt_choice(message: str, choices: list[str]) -> str:
     """Prompt for a choice from a list."""
+    from rich.prompt import Prompt
+
     return Prompt.ask(message, choices=choices)
 
 
 def print_creating_split() -> None:
     """Print creating split message."""
-    console.print()
-    console.print("[bold]Creating split...[/bold]")
-    console.print()
+    console.print("\n[bold]Creating split...[/bold]\n")
 
 
 def print_branch_progress(step: int, total: int, branch_name: str, status: str) -> None:
     """Print progress for branch creation."""
-    status_colors = {
-        "creating": "yellow",
-        "applying": "yellow",
-        "verifying": "yellow",
-        "pushing": "yellow",
-        "done": "green",
-        "skipped": "dim",
-        "failed": "red",
-    }
-    color = status_colors.get(status.split()[0].lower(), "white")
-    console.print(f"  [{step}/{total}] Creating branch '[bold]{branch_name}[/bold]'")
-    console.print(f"        [{color}]{status}[/{color}]")
+    if not _IS_TTY:
+        sys.stdout.write(f"  [{step}/{total}] Creating branch '{branch_name}'\n        {status}\n")
+        return
+
+    color = _status_color(status)
+    console.print(
+        f"  [{step}/{total}] Creating branch '[bold]{branch_name}[/bold]'\n"
+        f"        [{color}]{status}[/{color}]"
+    )
+
+
+@contextmanager
+def branch_progress() -> Iterator[Callable[[int, int, str, str], None]]:
+    """
+    Track branch creation in one live table for the whole execution.
+
+    Yields a callback with print_branch_progress's signature. Updates are
+    coalesced by Rich's refresh; off a terminal each one is printed plainly.
+    """
+    if not _IS_TTY:
+        yield print_branch_progress
+        return
+
+    from rich.live import Live
+    from rich.table import Table
+
+    rows: dict[int, tuple[int, str, str]] = {}
+
+    def render() -> Table:
+        table = Table(show_header=False, box=None, padding=(0, 1), pad_edge=False)
+        for step in sorted(rows):
+            total, branch_name, status = rows[step]
+            color = _status_color(status)
+            table.add_row(
+                f"  [{step}/{total}]",
+                f"Creating branch '[bold]{branch_name}[/bold]'",
+                f"[{color}]{status}[/{color}]",
+            )
+        return table
+
+    with Live(render(), console=console, refresh_per_second=8) as live:
+
+        def update(step: int, total: int, branch_name: str, status: str) -> None:
+            rows[step] = (total, branch_name, status)
+            live.update(render())
+
+        yield update
 
 
 def print_pr_created(url: str) -> None:
     """Print PR creation message."""
+    if not _IS_TTY:
+        sys.stdout.write(f"        Creating PR... done -> {url}\n")
+        return
+
     console.print(f"        Creating PR... [green]done[/green] -> {url}")
 
 
 def print_verification_result(result: VerificationResult) -> None:
     """Print hash verification result."""
-    console.print()
-    console.print("[bold]Verifying final state...[/bold]")
-    console.print()
+    if not _IS_TTY:
+        _write_plain_verification_result(result)
+        return
+
+    from rich.panel import Panel
+
+    renderables: list[RenderableType] = ["", "[bold]Verifying final state...[/bold]", ""]
 
     if result.passed:
-        console.print("[bold green]HASH CHECK: PASSED[/bold green]")
-        console.print()
+        renderables.append("[bold green]HASH CHECK: PASSED[/bold green]")
+        renderables.append("")
 
-        table = Table(show_header=False, box=None, padding=(0, 2))
-        table.add_column("Label")
-        table.add_column("Value")
+        table = _make_kv_table()
         table.add_row("Original branch:", result.original_hash)
         table.add_row("After split:", result.final_hash)
         table.add_row("", "")
         table.add_row("Status:", "[bold green]IDENTICAL[/bold green]")
 
-        console.print(Panel(table, width=50))
+        renderables.append(Panel(table, width=50))
     else:
-        console.print("[bold red]HASH CHECK: FAILED[/bold red]")
-        console.print()
+        renderables.append("[bold red]HASH CHECK: FAILED[/bold red]")
+        renderables.append("")
 
-        table = Table(show_header=False, box=None, padding=(0, 2))
-        table.add_column("Label")
-        table.add_column("Value")
+        table = _make_kv_table()
         table.add_row("Expected:", result.original_hash)
         table.add_row("Got:", result.final_hash)
 
-        console.print(Panel(table, width=50))
+        renderables.append(Panel(table, width=50))
 
         if result.differences:
-            console.print()
-            console.print("[bold]Differences found:[/bold]")
-            for diff in result.differences:
-                console.print(f"  {diff.get('file', 'unknown')}: {diff.get('description', '')}")
+            renderables.append("")
+            renderables.append("[bold]Differences found:[/bold]")
+            # Plain Text: paths are not markup, and skipping the parse is cheaper
+            renderables.append(Text("\n".join(
+                f"  {diff.get('file', 'unknown')}: {diff.get('description', '')}"
+                for diff in result.differences
+            )))
+
+    console.print(Group(*renderables))
+
+
+def _write_plain_verification_result(result: VerificationResult) -> None:
+    """Plain-text form of print_verification_result."""
+    lines = ["", "Verifying final state...", ""]
+
+    if result.passed:
+        lines.append("HASH CHECK: PASSED")
+        lines.append(f"  Original branch: {result.original_hash}")
+        lines.append(f"  After split:     {result.final_hash}")
+        lines.append("  Status:          IDENTICAL")
+    else:
+        lines.append("HASH CHECK: FAILED")
+        lines.append(f"  Expected: {result.original_hash}")
+        lines.append(f"  Got:      {result.final_hash}")
+
+        if result.differences:
+            lines.append("")
+            lines.append("Differences found:")
+            lines.extend(
+                f"  {diff.get('file', 'unknown')}: {diff.get('description', '')}"
+                for diff in result.differences
+            )
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def print_split_complete(intents: list[Intent]) -> None:
     """Print split completion summary."""
-    console.print()
-    console.print("[bold green]Split complete![/bold green]")
-    console.print()
-    console.print(f"  Created {len(intents)} PRs:")
-
+    lines = [
+        "",
+        "[bold green]Split complete![/bold green]",
+        "",
+        f"  Created {len(intents)} PRs:",
+    ]
+
+    pr_numbers = [intent.pr_number for intent in intents]
     for i, intent in enumerate(intents):
-        pr_num = f"#{intent.pr_number}" if intent.pr_number else "(no PR)"
-        base = f"(base: #{intents[i-1].pr_number})" if i > 0 and intents[i-1].pr_number else "(base: main)"
-        console.print(f"    {pr_num} {intent.name} {base}")
+        pr_num = f"#{pr_numbers[i]}" if pr_numbers[i] else "(no PR)"
+        prev = pr_numbers[i - 1] if i > 0 else None
+        base = f"(base: #{prev})" if prev else "(base: main)"
+        lines.append(f"    {pr_num} {intent.name} {base}")
+
+    console.print("\n".join(lines))
 
 
 def print_error(message: str) -> None:
@@ -216,21 +381,19 @@ def print_success(message: str) -> None:
 
 def print_retry(attempt: int, max_attempts: int, message: str) -> None:
     """Print retry information."""
-    console.print()
-    console.print(f"[yellow]Retry {attempt}/{max_attempts}:[/yellow] {message}")
+    console.print(f"\n[yellow]Retry {attempt}/{max_attempts}:[/yellow] {message}")
 
 
 def print_backtrack(from_phase: str, to_phase: str, reason: str) -> None:
     """Print backtrack information."""
-    console.print()
-    console.print(f"[yellow]Backtracking:[/yellow] {from_phase} -> {to_phase}")
-    console.print(f"  Reason: {reason}")
+    console.print(
+        f"\n[yellow]Backtracking:[/yellow] {from_phase} -> {to_phase}\n  Reason: {reason}"
+    )
 
 
 def print_cost_summary(tokens: int, cost: float) -> None:
     """Print cost summary."""
-    console.print()
-    console.print(f"[dim]Tokens used: {tokens:,} | Cost: ${cost:.4f}[/dim]")
+    console.print(f"\n[dim]Tokens used: {tokens:,} | Cost: ${cost:.4f}[/dim]")
 
 
 def print_session_saved(path: str) -> None:
@@ -245,20 +408,24 @@ def print_session_resumed(session_id: str) -> None:
 
 def print_dry_run_notice() -> None:
     """Print dry run notice."""
-    console.print()
-    console.print(Panel(
+    from rich.panel import Panel
+
+    console.print(Group("", Panel(
         "[yellow]DRY RUN MODE[/yellow] - No changes will be made",
         style="yellow",
-    ))
+    )))
 
 
 def print_babysit_question(question: str, options: list[str]) -> str:
     """Print a babysit mode question and get user input."""
-    console.print()
-    console.print(Panel(question, title="Decision Required", style="yellow"))
+    from rich.panel import Panel
+    from rich.prompt import Prompt
 
-    for i, opt in enumerate(options):
-        console.print(f"  [{i + 1}] {opt}")
+    console.print(Group(
+        "",
+        Panel(question, title="Decision Required", style="yellow"),
+        "\n".join(f"  [{i + 1}] {opt}" for i, opt in enumerate(options)),
+    ))
 
     choice = Prompt.ask("Choose", choices=[str(i + 1) for i in range(len(options))])
     return options[int(choice) - 1]
@@ -266,8 +433,10 @@ def print_babysit_question(question: str, options: list[str]) -> str:
 
 def print_escape_hatch_prompt() -> str:
     """Print escape hatch prompt."""
-    console.print()
-    console.print(Panel(
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+
+    console.print(Group("", Panel(
         "Escape Hatch: You can manually edit the intent mapping.\n"
         "Options:\n"
         "  [e] Open editor\n"
@@ -275,5 +444,5 @@ def print_escape_hatch_prompt() -> str:
         "  [a] Abort",
         title="Manual Intervention",
         style="cyan",
-    ))
+    )))
     return Prompt.ask("Choose", choices=["e", "s", "a"])
@@ -1,7 +1,7 @@
 """Main split engine with backtracking and self-healing."""
 
-from gitsplit.ai import AIClient
-from gitsplit.git import GitOperations
+from gitsplit.ai import AIClient, AIError
+from gitsplit.git import GitOperations, GitError
 from gitsplit.models import (
     Session,
     SessionPhase,
@@ -11,8 +11,11 @@ from gitsplit.models import (
     VerificationResult,
 )
 from gitsplit.phases import IntentDiscovery, ChangePlanner, Executor
-from gitsplit.verification import Verifier
-from gitsplit.session import save_session
+from gitsplit.phases.discovery import DiscoveryError
+from gitsplit.phases.execution import ExecutionError
+from gitsplit.phases.planning import PlanningError
+from gitsplit.verification import Verifier, VerificationError
+from gitsplit.session import encode_session, save_session
 from gitsplit import display
 
 
@@ -22,6 +25,26 @@ class EngineError(Exception):
     pass
 
 
+_TERMINAL_PHASES = frozenset({SessionPhase.COMPLETE, SessionPhase.FAILED})
+
+# Attempt numbers at which the AI moves up one model tier
+_ESCALATION_ATTEMPTS = frozenset({3, 5, 7})
+
+# Verifier actions that are handled by re-planning with error context
+_REPLAN_ACTIONS = frozenset({"retry_phase2", "retry_phase2_with_context"})
+
+# Failures that count as a spent attempt; anything else is a bug and propagates
+_RECOVERABLE_ERRORS = (
+    EngineError,
+    AIError,
+    GitError,
+    DiscoveryError,
+    PlanningError,
+    ExecutionError,
+    VerificationError,
+)
+
+
 class SplitEngine:
     """
     The main split engine implementing the three-phase architecture
@@ -37,6 +60,11 @@ class SplitEngine:
         self.git = git
         self.ai = ai
         self.session = session
+        # Whether the current discovered intents have been printed
+        self._intents_shown = False
+        # Session as last written, and whether that write skipped the flush
+        self._saved_state: bytes | None = None
+        self._save_unsynced = False
 
         self.verifier = Verifier(git)
         self.discovery = IntentDiscovery(git, ai, session)
@@ -47,48 +75,24 @@ class SplitEngine:
         """
         Run the split engine.
 
-        Returns True if split completed successfully.
+        Each iteration dispatches on the session phase until a terminal
+        phase is reached. Returns True if split completed successfully.
         """
+        handlers = {
+            SessionPhase.INIT: self._step_discovery,
+            SessionPhase.DISCOVERY: self._step_confirm,
+            SessionPhase.PLANNING: self._step_planning,
+            SessionPhase.EXECUTION: self._step_execution,
+            SessionPhase.VERIFICATION: self._step_execution,
+        }
+
         try:
-            while self.session.current_attempt <= self.session.max_attempts:
+            while self.session.phase not in _TERMINAL_PHASES:
                 try:
-                    # Phase 1: Discovery
-                    if self.session.phase in [SessionPhase.INIT, SessionPhase.DISCOVERY]:
-                        self._run_discovery()
-
-                    # User confirmation (unless auto mode)
-                    if self.session.phase == SessionPhase.DISCOVERY:
-                        if self.session.auto_mode:
-                            # Auto-confirm intents in auto mode
-                            for intent in self.session.discovered_intents:
-                                intent.is_confirmed = True
-                            self.session.confirmed_intents = self.session.discovered_intents
-                            self.session.phase = SessionPhase.PLANNING
-                        else:
-                            if not self._confirm_intents():
-                                return False
-
-                    # Phase 2: Planning
-                    if self.session.phase == SessionPhase.PLANNING:
-                        self._run_planning()
-
-                    # Phase 3: Execution
-                    if self.session.phase == SessionPhase.EXECUTION:
-                        result = self._run_execution()
-
-                        if result.passed:
-                            self.session.phase = SessionPhase.COMPLETE
-                            self._show_success()
-                            return True
-
-                        # Verification failed - try self-healing
-                        if not self._handle_verification_failure(result):
-                            # Self-healing exhausted
-                            self.session.phase = SessionPhase.FAILED
-                            display.print_error("Split failed after maximum retry attempts")
-                            return False
-
-                except Exception as e:
+                    if not handlers[self.session.phase]():
+                        return False
+
+                except _RECOVERABLE_ERRORS as e:
                     display.print_error(str(e))
                     self.session.current_attempt += 1
 
@@ -96,14 +100,78 @@ class SplitEngine:
                         self.session.phase = SessionPhase.FAILED
                         return False
 
-                    # Save session for potential resume
-                    save_session(self.session)
+                    # Save session for potential resume; the final durable
+                    # save covers the flush
+                    self._save_if_changed()
 
-            return False
+            return self.session.phase == SessionPhase.COMPLETE
 
         finally:
-            # Always save session at end
-            save_session(self.session)
+            # Always leave the latest state on disk, flushed to the device
+            self._save_if_changed(durable=True)
+
+    def _save_if_changed(self, durable: bool = False) -> None:
+        """Write the session unless it is unchanged since the last write."""
+        # Comparing the encoded session also catches in-place mutations
+        # (appended PRs and backtracks, edited intents)
+        state = encode_session(self.session)
+        if state == self._saved_state and not (durable and self._save_unsynced):
+            return
+        save_session(self.session, durable=durable, encoded=state)
+        self._saved_state = state
+        self._save_unsynced = not durable
+
+    def close(self) -> None:
+        """Release the shared AI client and the executor's git process."""
+        self.executor.close()
+        self.ai.close()
+
+    def _step_discovery(self) -> bool:
+        """INIT: discover intents."""
+        self._run_discovery()
+        return True
+
+    def _step_confirm(self) -> bool:
+        """DISCOVERY: confirm intents; returns False if the user aborts."""
+        # A session interrupted mid-discovery (or backtracked to it) has
+        # nothing to confirm yet
+        if not self.session.discovered_intents:
+            self._run_discovery()
+        elif not self.session.auto_mode and not self._intents_shown:
+            # Rediscovered or resumed intents haven't been shown yet
+            intents = self.session.discovered_intents
+            display.print_intents(intents, f"Found {len(intents)} distinct intents:")
+            display.print_pr_stack(intents)
+            self._intents_shown = True
+
+        if not self.session.auto_mode:
+            return self._confirm_intents()
+
+        # Auto-confirm intents in auto mode
+        for intent in self.session.discovered_intents:
+            intent.is_confirmed = True
+        self.session.confirmed_intents = self.session.discovered_intents
+        self.session.phase = SessionPhase.PLANNING
+        return True
+
+    def _step_planning(self) -> bool:
+        """PLANNING: map changes to intents."""
+        self._run_planning()
+        return True
+
+    def _step_execution(self) -> bool:
+        """EXECUTION: create branches, then verify or self-heal."""
+        result = self._run_execution()
+
+        if result.passed:
+            self.session.phase = SessionPhase.COMPLETE
+            self._show_success()
+        elif not self._handle_verification_failure(result):
+            # Self-healing exhausted
+            self.session.phase = SessionPhase.FAILED
+            display.print_error("Split failed after maximum retry attempts")
+
+        return True
 
     def _run_discovery(self) -> None:
         """Run Phase 1: Intent Discovery."""
@@ -111,8 +179,8 @@ class SplitEngine:
 
         display.print_scanning(self.session.branch, self.session.base_branch)
 
-        file_diffs = self.git.get_diff(self.session.base_branch)
-        display.print_file_count(len(file_diffs))
+        file_stats = self.git.get_diff_stats(self.session.base_branch)
+        display.print_file_count(len(file_stats))
 
         with display.create_spinner("Identifying intents...") as progress:
             task = progress.add_task("Identifying intents...", total=None)
@@ -125,6 +193,7 @@ class SplitEngine:
         display.print_info(f"Done in {self.ai.usage.total_cost:.2f}s (estimated)")
         display.print_intents(intents, f"Found {len(intents)} distinct intents:")
         display.print_pr_stack(intents)
+        self._intents_shown = True
 
     def _confirm_intents(self) -> bool:
         """Get user confirmation for discovered intents."""
@@ -213,10 +282,8 @@ class SplitEngine:
         if not plan:
             raise EngineError("No change plan available")
 
-        def on_progress(step: int, total: int, branch: str, status: str) -> None:
-            display.print_branch_progress(step, total, branch, status)
-
-        result = self.executor.execute(plan, on_progress)
+        with display.branch_progress() as on_progress:
+            result = self.executor.execute(plan, on_progress)
 
         display.print_verification_result(result)
         return result
@@ -250,7 +317,7 @@ class SplitEngine:
         action = diagnosis["suggested_action"]
         error_details = "\n".join(diagnosis.get("details", []))
 
-        if action == "retry_phase2" or action == "retry_phase2_with_context":
+        if action in _REPLAN_ACTIONS:
             # Retry planning with error context in conversation
             display.print_backtrack(
                 self.session.phase.value,
@@ -286,6 +353,7 @@ class SplitEngine:
                     error_context=result.diagnosis,
                 )
                 self.session.discovered_intents = intents
+                self._intents_shown = False
                 self.session.phase = SessionPhase.DISCOVERY  # Need user confirmation again
             except Exception as e:
                 display.print_error(f"Re-discovery failed: {e}")
@@ -301,10 +369,15 @@ class SplitEngine:
                 self.session.change_plan = plan
                 self.session.phase = SessionPhase.EXECUTION
             except Exception:
+                display.print_backtrack(
+                    self.session.phase.value,
+                    SessionPhase.PLANNING.value,
+                    diagnosis["likely_cause"],
+                )
                 self._backtrack_to(SessionPhase.PLANNING, result.diagnosis)
 
-        # Escalate AI tier if needed
-        if self.session.current_attempt >= 3:
+        # Escalate AI tier only when an escalation threshold is reached
+        if self.session.current_attempt in _ESCALATION_ATTEMPTS:
             self.ai.escalate_tier()
 
         return True
@@ -316,7 +389,12 @@ class SplitEngine:
         preserved_intents: list[str] | None = None,
         preserved_files: list[str] | None = None,
     ) -> None:
-        """Backtrack to a previous phase."""
+        """
+        Backtrack to a previous phase.
+
+        Records and saves the backtrack only; callers announce it with
+        display.print_backtrack before attempting recovery.
+        """
         backtrack = BacktrackInfo(
             from_phase=self.session.phase,
             to_phase=target_phase,
@@ -329,14 +407,13 @@ class SplitEngine:
         self.session.backtracks.append(backtrack)
         self.session.phase = target_phase
 
-        display.print_backtrack(
-            self.session.phase.value,
-            target_phase.value,
-            reason,
-        )
+        # Force fresh discovery instead of re-confirming the failed intents
+        if target_phase == SessionPhase.DISCOVERY:
+            self.session.discovered_intents = []
+            self.session.confirmed_intents = []
 
         # Save session
-        save_session(self.session)
+        self._save_if_changed(durable=True)
 
     def _show_success(self) -> None:
         """Show success message and summary."""
@@ -361,10 +438,20 @@ def create_engine(
     model: str | None = None,
     max_cost: float | None = None,
     session: Session | None = None,
+    use_cache: bool = True,
+    cache_history_threshold: int = 6,
+    max_history: int = 32,
 ) -> SplitEngine:
     """Create a configured split engine."""
     git = GitOperations(repo_path)
-    ai = AIClient(api_key, model_override=model, max_cost=max_cost)
+    ai = AIClient(
+        api_key,
+        model_override=model,
+        max_cost=max_cost,
+        use_cache=use_cache,
+        conversation_history_threshold=cache_history_threshold,
+        max_history=max_history,
+    )
 
     if session is None:
         from gitsplit.session import generate_session_id
@@ -1,15 +1,36 @@
 """Git operations for gitsplit."""
 
 import hashlib
+import os
+import re
 import subprocess
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 
 from git import Repo
-from git.exc import GitCommandError, InvalidGitRepositoryError
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
 
 
-@dataclass
+# Anchored to line start: body lines begin with " ", "+", "-" or "\\"
+_HUNK_HEADER_RE = re.compile(r"(?m)^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+_STAGE_BATCH_SIZE = 500
+
+# Boundaries inside `git diff -p` output
+_FILE_DIFF_SPLIT_RE = re.compile(rb"(?m)^diff --git ")
+_FIRST_HUNK_RE = re.compile(rb"(?m)^@@ ")
+_BINARY_LINE_RE = re.compile(rb"(?m)^Binary files ")
+_RENAME_TO_RE = re.compile(rb"(?m)^rename to (.*)$")
+# C-style escapes git uses in quoted paths
+_QUOTED_ESCAPE_RE = re.compile(rb"\\([0-7]{3}|.)")
+_QUOTED_ESCAPES = {
+    b"a": b"\a", b"b": b"\b", b"f": b"\f", b"n": b"\n",
+    b"r": b"\r", b"t": b"\t", b"v": b"\v",
+}
+
+
+@dataclass(slots=True)
 class DiffHunk:
     """A hunk from a git diff."""
 
@@ -25,7 +46,7 @@ class DiffHunk:
     old_path: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FileDiff:
     """Diff information for a single file."""
 
@@ -38,10 +59,93 @@ class FileDiff:
     is_renamed: bool = False
     old_path: str | None = None
 
+    # Memoized full_diff; slots rule out cached_property
+    _full_diff: str | None = field(default=None, init=False, repr=False, compare=False)
+
     @property
     def full_diff(self) -> str:
         """Get the complete diff content for this file."""
-        return "\n".join(h.content for h in self.hunks)
+        if self._full_diff is None:
+            self._full_diff = "\n".join([h.content for h in self.hunks])
+        return self._full_diff
+
+
+def _decode_path(raw: bytes) -> str:
+    """Decode a path from NUL-separated git output."""
+    return raw.decode("utf-8", errors="replace")
+
+
+def _unquote_path(raw: bytes) -> bytes:
+    """Undo git's C-style quoting of a path in diff headers, if present."""
+    if not raw.startswith(b'"'):
+        return raw
+
+    def unescape(match: re.Match[bytes]) -> bytes:
+        code = match.group(1)
+        if len(code) == 3:
+            return bytes([int(code, 8)])
+        return _QUOTED_ESCAPES.get(code, code)
+
+    return _QUOTED_ESCAPE_RE.sub(unescape, raw[1:-1])
+
+
+def _split_file_patch(patch: bytes) -> tuple[bytes, bytes]:
+    """
+    Split one file's patch into its extended header and body.
+
+    The body starts at the first hunk; without hunks it is the "Binary files
+    ... differ" line if present, else empty (e.g. a pure rename).
+    """
+    match = _FIRST_HUNK_RE.search(patch)
+    if match is None:
+        match = _BINARY_LINE_RE.search(patch)
+    if match is None:
+        return patch, b""
+    return patch[: match.start()], patch[match.start():]
+
+
+def _patch_path(header: bytes) -> str:
+    """
+    Post-image path named by one file's patch header (after "diff --git ").
+
+    Renames give it on their "rename to" line. Otherwise both paths in the
+    first line are the same, so "a/P b/P" (or its quoted form) splits evenly;
+    the diff is run with explicit a/ and b/ prefixes to keep that shape.
+    """
+    match = _RENAME_TO_RE.search(header)
+    if match is not None:
+        return _decode_path(_unquote_path(match.group(1)))
+
+    line = header.split(b"\n", 1)[0]
+    return _decode_path(_unquote_path(line[(len(line) + 1) // 2:])[2:])
+
+
+def _parse_numstat(raw: bytes) -> list[tuple[int, int, str, str | None]]:
+    """
+    Parse `git diff --numstat -z` records into (additions, deletions, path,
+    old_path) tuples, with old_path set only for renames.
+
+    Binary files are counted as 0/0.
+    """
+    numstat = []
+    fields = raw.rstrip(b"\0").split(b"\0") if raw else []
+    i = 0
+    while i < len(fields):
+        adds, dels, path = fields[i].split(b"\t", 2)
+        old_path = None
+        if not path:
+            # Renames are "adds\tdels\t" followed by old and new path fields
+            old_path = _decode_path(fields[i + 1])
+            path = fields[i + 2]
+            i += 2
+        numstat.append((
+            int(adds) if adds != b"-" else 0,
+            int(dels) if dels != b"-" else 0,
+            _decode_path(path),
+            old_path,
+        ))
+        i += 1
+    return numstat
 
 
 class GitError(Exception):
@@ -55,11 +159,37 @@ class GitOperations:
 
     def __init__(self, repo_path: str | Path | None = None):
         self.repo_path = Path(repo_path) if repo_path else Path.cwd()
+        # C locale skips git's message translation; optional locks off so
+        # read-only commands never take index.lock to refresh stat info
+        self._git_env = {**os.environ, "LC_ALL": "C", "GIT_OPTIONAL_LOCKS": "0"}
+
+        # Verify with git itself; the GitPython Repo is only built if needed
         try:
-            self.repo = Repo(self.repo_path)
-        except InvalidGitRepositoryError:
+            result = subprocess.run(
+                ["git", "rev-parse", "--git-dir"],
+                cwd=self.repo_path,
+                env=self._git_env,
+                capture_output=True,
+                encoding="utf-8",
+            )
+        except (FileNotFoundError, NotADirectoryError):
+            raise GitError(f"Not a git repository: {self.repo_path}")
+        if result.returncode != 0:
             raise GitError(f"Not a git repository: {self.repo_path}")
 
+        # (base, HEAD commit) -> merge base sha; HEAD moves during execution
+        self._merge_base_cache: dict[tuple[str, str], str] = {}
+
+    @cached_property
+    def repo(self) -> Repo:
+        """GitPython repository, created on first use."""
+        try:
+            repo = Repo(self.repo_path, search_parent_directories=True)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            raise GitError(f"Not a git repository: {self.repo_path}")
+        repo.git.update_environment(LC_ALL="C", GIT_OPTIONAL_LOCKS="0")
+        return repo
+
     @property
     def current_branch(self) -> str:
         """Get the current branch name."""
@@ -69,6 +199,11 @@ class GitOperations:
 
     def get_default_branch(self) -> str:
         """Get the default branch (main or master)."""
+        return self.default_branch
+
+    @cached_property
+    def default_branch(self) -> str:
+        """The default branch, resolved once per instance."""
         for name in ["main", "master"]:
             try:
                 self.repo.refs[name]
@@ -93,33 +228,28 @@ class GitOperations:
         if base_branch is None:
             base_branch = self.get_default_branch()
 
-        try:
-            # Get merge base to find where branches diverged
-            merge_base = self.repo.merge_base(base_branch, "HEAD")
-            if not merge_base:
-                raise GitError(f"No common ancestor between {base_branch} and HEAD")
-
-            merge_base_commit = merge_base[0]
-
-            # Get diff from merge base to HEAD
-            diff_index = merge_base_commit.diff("HEAD", create_patch=True)
-
-        except GitCommandError as e:
-            raise GitError(f"Failed to get diff: {e}")
+        numstat, patches = self._run_git_diff_numstat(self._get_merge_base(base_branch))
 
         file_diffs = []
-        for diff in diff_index:
-            path = diff.b_path or diff.a_path
-            hunks = self._parse_diff_hunks(diff, path)
-
-            additions = 0
-            deletions = 0
-            if diff.diff:
-                for line in diff.diff.decode("utf-8", errors="replace").split("\n"):
-                    if line.startswith("+") and not line.startswith("+++"):
-                        additions += 1
-                    elif line.startswith("-") and not line.startswith("---"):
-                        deletions += 1
+        for additions, deletions, path, old_path in numstat:
+            sections = patches.get(path, [])
+            # A type change (e.g. file to symlink) is a deletion plus a
+            # creation of the same path; together they are a modification
+            is_new = bool(sections) and all(
+                b"\nnew file mode " in header for header, _ in sections
+            )
+            is_deleted = bool(sections) and all(
+                b"\ndeleted file mode " in header for header, _ in sections
+            )
+            is_renamed = old_path is not None
+
+            hunks = []
+            for _, body in sections:
+                hunks.extend(
+                    self._parse_diff_hunks(
+                        body, path, is_new, is_deleted, is_renamed, old_path
+                    )
+                )
 
             file_diffs.append(
                 FileDiff(
@@ -127,60 +257,150 @@ class GitOperations:
                     hunks=hunks,
                     additions=additions,
                     deletions=deletions,
-                    is_new=diff.new_file,
-                    is_deleted=diff.deleted_file,
-                    is_renamed=diff.renamed,
-                    old_path=diff.a_path if diff.renamed else None,
+                    is_new=is_new,
+                    is_deleted=is_deleted,
+                    is_renamed=is_renamed,
+                    old_path=old_path,
                 )
             )
 
         return file_diffs
 
-    def _parse_diff_hunks(self, diff, path: str) -> list[DiffHunk]:
-        """Parse diff hunks from a diff object."""
-        if not diff.diff:
+    def get_diff_stats(self, base_branch: str | None = None) -> list[FileDiff]:
+        """
+        Get per-file line counts without generating the patch.
+
+        Returns FileDiff objects with empty hunks; use get_diff when the hunk
+        content is needed. New/deleted flags are not detected here.
+        """
+        if base_branch is None:
+            base_branch = self.get_default_branch()
+
+        try:
+            result = subprocess.run(
+                [
+                    "git", "diff", "--no-color", "--no-ext-diff", "-M",
+                    "--src-prefix=a/", "--dst-prefix=b/",
+                    "--numstat", "-z", self._get_merge_base(base_branch), "HEAD", "--",
+                ],
+                cwd=self.repo_path,
+                env=self._git_env,
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode("utf-8", errors="replace")
+            raise GitError(f"Failed to get diff stats: {stderr}")
+
+        return [
+            FileDiff(
+                path=path,
+                hunks=[],
+                additions=additions,
+                deletions=deletions,
+                is_renamed=old_path is not None,
+                old_path=old_path,
+            )
+            for additions, deletions, path, old_path in _parse_numstat(result.stdout)
+        ]
+
+    def _get_merge_base(self, base_branch: str) -> str:
+        """Merge base of base_branch and HEAD, cached per HEAD commit."""
+        key = (base_branch, self.repo.head.commit.hexsha)
+        merge_base = self._merge_base_cache.get(key)
+        if merge_base is not None:
+            return merge_base
+
+        result = subprocess.run(
+            ["git", "merge-base", base_branch, "HEAD"],
+            cwd=self.repo_path,
+            env=self._git_env,
+            capture_output=True,
+            encoding="utf-8",
+        )
+        if result.returncode == 1 and not result.stderr:
+            raise GitError(f"No common ancestor between {base_branch} and HEAD")
+        if result.returncode != 0:
+            raise GitError(f"Failed to get diff: {result.stderr}")
+
+        merge_base = result.stdout.strip()
+        self._merge_base_cache[key] = merge_base
+        return merge_base
+
+    def _run_git_diff_numstat(
+        self, merge_base: str
+    ) -> tuple[
+        list[tuple[int, int, str, str | None]], dict[str, list[tuple[bytes, bytes]]]
+    ]:
+        """
+        Run one `git diff --numstat -p -z` from merge_base to HEAD.
+
+        Returns (additions, deletions, path, old_path) per file, with old_path
+        set only for renames, and the (header, body) patch sections for each
+        path. Binary files are counted as 0/0.
+        """
+        try:
+            result = subprocess.run(
+                [
+                    "git", "diff", "--no-color", "--no-ext-diff", "-M",
+                    "--src-prefix=a/", "--dst-prefix=b/",
+                    "--numstat", "-p", "-z", merge_base, "HEAD", "--",
+                ],
+                cwd=self.repo_path,
+                env=self._git_env,
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode("utf-8", errors="replace")
+            raise GitError(f"Failed to get diff: {stderr}")
+
+        # The NUL-terminated numstat records end with an empty record, then the patch
+        numstat_part, _, patch = result.stdout.partition(b"\0\0")
+
+        # Match sections to files by path, not position: a type change has one
+        # numstat record but two "diff --git" sections
+        patches: dict[str, list[tuple[bytes, bytes]]] = {}
+        for file_patch in _FILE_DIFF_SPLIT_RE.split(patch)[1:]:
+            header, body = _split_file_patch(file_patch)
+            patches.setdefault(_patch_path(header), []).append((header, body))
+        return _parse_numstat(numstat_part), patches
+
+    def _parse_diff_hunks(
+        self,
+        patch: bytes,
+        path: str,
+        is_new: bool = False,
+        is_deleted: bool = False,
+        is_renamed: bool = False,
+        old_path: str | None = None,
+    ) -> list[DiffHunk]:
+        """Parse diff hunks from a file's patch body (from the first @@)."""
+        if not patch:
             return []
 
-        content = diff.diff.decode("utf-8", errors="replace")
+        content = patch.decode("utf-8", errors="replace")
         hunks = []
 
-        # Split by hunk headers
-        import re
-
-        hunk_pattern = r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@"
-        parts = re.split(f"({hunk_pattern})", content)
-
-        i = 0
-        while i < len(parts):
-            if parts[i].startswith("@@"):
-                match = re.match(hunk_pattern, parts[i])
-                if match:
-                    old_start = int(match.group(1))
-                    old_count = int(match.group(2)) if match.group(2) else 1
-                    new_start = int(match.group(3))
-                    new_count = int(match.group(4)) if match.group(4) else 1
-
-                    # Get hunk content (next part after the header components)
-                    hunk_content = ""
-                    if i + 1 < len(parts):
-                        hunk_content = parts[i] + parts[i + 1]
-                        i += 1
-
-                    hunks.append(
-                        DiffHunk(
-                            file_path=path,
-                            old_start=old_start,
-                            old_count=old_count,
-                            new_start=new_start,
-                            new_count=new_count,
-                            content=hunk_content,
-                            is_new_file=diff.new_file,
-                            is_deleted_file=diff.deleted_file,
-                            is_renamed=diff.renamed,
-                            old_path=diff.a_path if diff.renamed else None,
-                        )
-                    )
-            i += 1
+        # Each hunk runs from its header to the next header (or the end)
+        matches = list(_HUNK_HEADER_RE.finditer(content))
+        for k, match in enumerate(matches):
+            body_end = matches[k + 1].start() if k + 1 < len(matches) else len(content)
+
+            hunks.append(
+                DiffHunk(
+                    file_path=path,
+                    old_start=int(match.group(1)),
+                    old_count=int(match.group(2) or 1),
+                    new_start=int(match.group(3)),
+                    new_count=int(match.group(4) or 1),
+                    content=content[match.start():body_end],
+                    is_new_file=is_new,
+                    is_deleted_file=is_deleted,
+                    is_renamed=is_renamed,
+                    old_path=old_path,
+                )
+            )
 
         # If no hunks parsed, create a single hunk with all content
         if not hunks and content:
@@ -192,43 +412,54 @@ class GitOperations:
                     new_start=1,
                     new_count=0,
                     content=content,
-                    is_new_file=diff.new_file,
-                    is_deleted_file=diff.deleted_file,
-                    is_renamed=diff.renamed,
-                    old_path=diff.a_path if diff.renamed else None,
+                    is_new_file=is_new,
+                    is_deleted_file=is_deleted,
+                    is_renamed=is_renamed,
+                    old_path=old_path,
                 )
             )
 
         return hunks
 
-    def get_raw_diff(self, base_branch: str | None = None) -> str:
-        """Get the raw diff output as a string."""
+    def get_raw_diff(
+        self,
+        base_branch: str | None = None,
+        context_lines: int | None = None,
+        exclude: list[str] | None = None,
+    ) -> str:
+        """
+        Get the raw diff output as a string.
+
+        context_lines overrides git's default of 3 unchanged lines around each
+        hunk, and paths in exclude are left out of the diff entirely.
+        """
         if base_branch is None:
             base_branch = self.get_default_branch()
 
-        try:
-            # Get merge base
-            result = subprocess.run(
-                ["git", "merge-base", base_branch, "HEAD"],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            merge_base = result.stdout.strip()
+        args = ["git", "diff"]
+        if context_lines is not None:
+            args.append(f"-U{context_lines}")
+        # base...HEAD diffs from the merge base, computed inside git
+        args += [f"{base_branch}...HEAD", "--"]
+        if exclude:
+            # With only exclusions, git diffs everything else
+            args += [f":(exclude,literal){path}" for path in exclude]
 
-            # Get diff
+        try:
             result = subprocess.run(
-                ["git", "diff", merge_base, "HEAD"],
+                args,
                 cwd=self.repo_path,
+                env=self._git_env,
                 capture_output=True,
-                text=True,
                 check=True,
             )
-            return result.stdout
+            return result.stdout.decode("utf-8", errors="replace")
 
         except subprocess.CalledProcessError as e:
-            raise GitError(f"Failed to get diff: {e.stderr}")
+            stderr = e.stderr.decode("utf-8", errors="replace")
+            if "no merge base" in stderr:
+                raise GitError(f"No common ancestor between {base_branch} and HEAD")
+            raise GitError(f"Failed to get diff: {stderr}")
 
     def get_tree_hash(self, ref: str = "HEAD") -> str:
         """Get the tree hash for a ref (commit-independent content hash)."""
@@ -236,14 +467,38 @@ class GitOperations:
             result = subprocess.run(
                 ["git", "rev-parse", f"{ref}^{{tree}}"],
                 cwd=self.repo_path,
+                env=self._git_env,
                 capture_output=True,
-                text=True,
+                encoding="utf-8",
                 check=True,
             )
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
             raise GitError(f"Failed to get tree hash: {e.stderr}")
 
+    def get_tree_hashes(self, refs: list[str]) -> list[str]:
+        """Get the tree hash for each ref with one `git cat-file --batch-check`."""
+        request = "".join(f"{ref}^{{tree}}\n" for ref in refs).encode("utf-8")
+        result = subprocess.run(
+            ["git", "cat-file", "--batch-check"],
+            cwd=self.repo_path,
+            env=self._git_env,
+            input=request,
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace")
+            raise GitError(f"Failed to get tree hashes: {stderr}")
+
+        # Each reply is "<sha> tree <size>" or "<object> missing"
+        hashes = []
+        for ref, line in zip(refs, result.stdout.decode("utf-8").splitlines()):
+            header = line.split(" ")
+            if len(header) != 3 or header[1] != "tree":
+                raise GitError(f"Failed to get tree hash: {ref} is not a valid ref")
+            hashes.append(header[0])
+        return hashes
+
     def get_content_hash(self, ref: str = "HEAD") -> str:
         """
         Get a content-only hash for verification.
@@ -254,21 +509,24 @@ class GitOperations:
         - Author metadata
         - Branch names
         """
-        try:
-            # Get list of all files and their content hashes
-            result = subprocess.run(
-                ["git", "ls-tree", "-r", ref],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True,
+        # Stream ls-tree output (mode, type, hash, path for each file) into the
+        # hash so large trees are never held in memory
+        with subprocess.Popen(
+            ["git", "ls-tree", "-r", ref],
+            cwd=self.repo_path,
+            env=self._git_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ) as proc:
+            digest = hashlib.file_digest(proc.stdout, "sha256")
+            stderr = proc.stderr.read()
+
+        if proc.returncode != 0:
+            raise GitError(
+                f"Failed to get content hash: {stderr.decode('utf-8', errors='replace')}"
             )
 
-            # Hash the tree output (contains mode, type, hash, path for each file)
-            return hashlib.sha256(result.stdout.encode()).hexdigest()[:16]
-
-        except subprocess.CalledProcessError as e:
-            raise GitError(f"Failed to get content hash: {e.stderr}")
+        return digest.hexdigest()[:16]
 
     def create_branch(self, name: str, from_ref: str = "HEAD") -> None:
         """Create a new branch."""
@@ -284,6 +542,18 @@ class GitOperations:
         except (GitCommandError, IndexError) as e:
             raise GitError(f"Failed to checkout branch {name}: {e}")
 
+    def checkout_new_branch(self, name: str, from_ref: str = "HEAD") -> None:
+        """Create (or reset) a branch at from_ref and check it out in one git process."""
+        result = subprocess.run(
+            ["git", "checkout", "-q", "-B", name, from_ref, "--"],
+            cwd=self.repo_path,
+            env=self._git_env,
+            capture_output=True,
+            encoding="utf-8",
+        )
+        if result.returncode != 0:
+            raise GitError(f"Failed to create branch {name}: {result.stderr}")
+
     def delete_branch(self, name: str, force: bool = False) -> None:
         """Delete a branch."""
         try:
@@ -291,32 +561,39 @@ class GitOperations:
         except GitCommandError as e:
             raise GitError(f"Failed to delete branch {name}: {e}")
 
-    def branch_exists(self, name: str) -> bool:
-        """Check if a branch exists."""
-        return name in [h.name for h in self.repo.heads]
+    def delete_branches(self, names: list[str], force: bool = False) -> None:
+        """
+        Delete several branches with one git process.
 
-    def apply_patch(self, patch: str) -> None:
+        git keeps going past branches it cannot delete, so one failure does
+        not stop the rest; GitError is raised afterwards if any failed.
+        """
+        if not names:
+            return
+
+        result = subprocess.run(
+            ["git", "branch", "-D" if force else "-d", "--", *names],
+            cwd=self.repo_path,
+            env=self._git_env,
+            capture_output=True,
+            encoding="utf-8",
+        )
+        if result.returncode != 0:
+            raise GitError(f"Failed to delete branches: {result.stderr}")
+
+    def apply_patch(self, patch: str | bytes) -> None:
         """Apply a patch to the working tree."""
-        try:
-            result = subprocess.run(
-                ["git", "apply", "--check"],
-                cwd=self.repo_path,
-                input=patch,
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode != 0:
-                raise GitError(f"Patch would not apply cleanly: {result.stderr}")
-
-            subprocess.run(
-                ["git", "apply"],
-                cwd=self.repo_path,
-                input=patch,
-                check=True,
-                text=True,
-            )
-        except subprocess.CalledProcessError as e:
-            raise GitError(f"Failed to apply patch: {e}")
+        # git apply is all-or-nothing, so a separate --check pass adds nothing
+        result = subprocess.run(
+            ["git", "apply"],
+            cwd=self.repo_path,
+            env=self._git_env,
+            input=patch.encode("utf-8") if isinstance(patch, str) else patch,
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace")
+            raise GitError(f"Patch would not apply cleanly: {stderr}")
 
     def commit(self, message: str, allow_empty: bool = False) -> str:
         """Create a commit and return the commit hash."""
@@ -337,39 +614,89 @@ class GitOperations:
 
     def stage_files(self, files: list[str]) -> None:
         """Stage specific files."""
-        for f in files:
-            self.repo.git.add(f)
+        # One git process per batch rather than per file; batches stay under ARG_MAX
+        for i in range(0, len(files), _STAGE_BATCH_SIZE):
+            self.repo.git.add("--", *files[i:i + _STAGE_BATCH_SIZE])
 
     def get_file_content(self, path: str, ref: str = "HEAD") -> str | None:
         """Get the content of a file at a specific ref."""
-        try:
-            result = subprocess.run(
-                ["git", "show", f"{ref}:{path}"],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode == 0:
-                return result.stdout
-            return None
-        except subprocess.CalledProcessError:
+        result = subprocess.run(
+            ["git", "show", f"{ref}:{path}"],
+            cwd=self.repo_path,
+            env=self._git_env,
+            capture_output=True,
+        )
+        if result.returncode != 0:
             return None
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def get_file_contents(self, paths: list[str], ref: str = "HEAD") -> dict[str, str | None]:
+        """
+        Get the content of several files at a ref with one `git cat-file --batch`.
+
+        Paths missing at the ref (or not files) map to None.
+        """
+        contents: dict[str, str | None] = {}
+        # The batch protocol is line-based, so a path with a newline can't be sent
+        batch = [p for p in dict.fromkeys(paths) if "\n" not in p]
+        for path in paths:
+            if "\n" in path:
+                contents[path] = self.get_file_content(path, ref)
+        if not batch:
+            return contents
+
+        request = "".join(f"{ref}:{path}\n" for path in batch).encode("utf-8")
+        result = subprocess.run(
+            ["git", "cat-file", "--batch"],
+            cwd=self.repo_path,
+            env=self._git_env,
+            input=request,
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace")
+            raise GitError(f"Failed to read files at {ref}: {stderr}")
+
+        # Each reply is "<sha> <type> <size>\n<content>\n" or "<object> missing\n"
+        out = result.stdout
+        pos = 0
+        for path in batch:
+            eol = out.index(b"\n", pos)
+            # A missing path may itself contain spaces, so count from the right
+            header = out[pos:eol].rsplit(b" ", 2)
+            pos = eol + 1
+            if len(header) != 3 or not header[2].isdigit():
+                contents[path] = None
+                continue
+            size = int(header[2])
+            data = out[pos:pos + size]
+            pos += size + 1
+            contents[path] = (
+                data.decode("utf-8", errors="replace") if header[1] == b"blob" else None
+            )
+
+        return contents
 
     def push_branch(self, branch: str, set_upstream: bool = True) -> None:
         """Push a branch to origin."""
+        self.push_branches([branch], set_upstream)
+
+    def push_branches(self, branches: list[str], set_upstream: bool = True) -> None:
+        """Push several branches to origin in one git push."""
         try:
             args = ["git", "push"]
             if set_upstream:
-                args.extend(["-u", "origin", branch])
-            else:
-                args.extend(["origin", branch])
+                args.append("-u")
+            args.append("origin")
+            args.extend(branches)
 
             subprocess.run(
                 args,
                 cwd=self.repo_path,
+                env=self._git_env,
                 check=True,
                 capture_output=True,
-                text=True,
+                encoding="utf-8",
             )
         except subprocess.CalledProcessError as e:
             raise GitError(f"Failed to push branch: {e.stderr}")
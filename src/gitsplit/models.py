@@ -3,7 +3,13 @@
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from gitsplit.ai import AIResponse
+
+
+SESSIONS_DIR = Path.home() / ".gitsplit" / "sessions"
 
 
 class SessionPhase(str, Enum):
@@ -27,7 +33,7 @@ class ResolutionStrategy(str, Enum):
     MANUAL = "manual"  # User specifies via Escape Hatch
 
 
-@dataclass
+@dataclass(slots=True)
 class LineRange:
     """A range of lines in a file."""
 
@@ -43,7 +49,7 @@ class LineRange:
         return self.start <= line <= self.end
 
 
-@dataclass
+@dataclass(slots=True)
 class FileChange:
     """A change to a file attributed to an intent."""
 
@@ -58,7 +64,7 @@ class FileChange:
         return self.additions + self.deletions
 
 
-@dataclass
+@dataclass(slots=True)
 class Intent:
     """A logical unit of work identified in the changes."""
 
@@ -81,7 +87,7 @@ class Intent:
         return sum(f.deletions for f in self.files)
 
 
-@dataclass
+@dataclass(slots=True)
 class MultiIntentConflict:
     """A conflict where a file has changes for multiple intents."""
 
@@ -93,7 +99,7 @@ class MultiIntentConflict:
     chosen_strategy: ResolutionStrategy | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChangePlan:
     """The complete plan for splitting changes."""
 
@@ -103,7 +109,7 @@ class ChangePlan:
     is_validated: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class VerificationResult:
     """Result of hash verification."""
 
@@ -127,7 +133,7 @@ class VerificationResult:
         return "\n".join(lines)
 
 
-@dataclass
+@dataclass(slots=True)
 class BacktrackInfo:
     """Information about a backtrack decision."""
 
@@ -139,7 +145,7 @@ class BacktrackInfo:
     preserved_files: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     """Persistent session state for split operations."""
 
@@ -179,6 +185,11 @@ class Session:
     no_verify_build: bool = False
     no_pr: bool = False
 
+    def add_usage(self, response: "AIResponse") -> None:
+        """Add token usage and cost from an AI response."""
+        self.total_tokens_used += response.input_tokens + response.output_tokens
+        self.total_cost += response.cost
+
     def get_session_path(self) -> Path:
         """Get the path to the session file."""
-        return Path.home() / ".gitsplit" / "sessions" / f"{self.id}.json"
+        return SESSIONS_DIR / f"{self.id}.json"
@@ -4,13 +4,90 @@ This module handles the complex task of splitting a file's changes
 across multiple intents, generating valid unified diff patches for each.
 """
 
-import re
+import codecs
 import subprocess
+import threading
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-
-
-@dataclass
+from typing import BinaryIO, Iterable, Iterator
+
+
+# Beyond this many paths get_parsed_diff diffs everything instead of passing
+# a pathspec, keeping the git command line well under ARG_MAX
+_PATHSPEC_LIMIT = 500
+
+_STREAM_CHUNK_SIZE = 1 << 16
+
+# Content lines shorter than this are deduplicated while parsing
+_INTERN_MAX_LEN = 32
+
+
+def _parse_hunk_header(line: str) -> tuple[int, int, int, int] | None:
+    """Parse "@@ -old_start[,old_count] +new_start[,new_count] @@" without a regex."""
+    end = line.find(" @@", 4)
+    if end < 0 or not line.startswith("@@ -"):
+        return None
+    old, sep, new = line[4:end].partition(" +")
+    if not sep:
+        return None
+    old_start, _, old_count = old.partition(",")
+    new_start, _, new_count = new.partition(",")
+    try:
+        return (
+            int(old_start),
+            int(old_count) if old_count else 1,
+            int(new_start),
+            int(new_count) if new_count else 1,
+        )
+    except ValueError:
+        return None
+
+
+def _full_diff_command(base_ref: str, source_ref: str, paths: list[str] | None) -> list[str]:
+    """git diff command for base_ref..source_ref, limited to paths if given."""
+    cmd = ["git", "--literal-pathspecs", "diff", base_ref, source_ref]
+    if paths is not None:
+        cmd += ["--", *paths]
+    return cmd
+
+
+def _iter_diff_lines(stream: BinaryIO) -> Iterator[str]:
+    """
+    Decode a binary stream in chunks and yield its lines without newlines.
+
+    Splits only on "\n" and ends with the text after the last newline,
+    matching str.split("\n") on the whole decoded output.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+    # Pieces of the current unfinished line, joined once its newline arrives
+    pending: list[str] = []
+    while chunk := stream.read(_STREAM_CHUNK_SIZE):
+        lines = decoder.decode(chunk).split("\n")
+        if len(lines) > 1:
+            pending.append(lines[0])
+            lines[0] = "".join(pending)
+            pending = [lines.pop()]
+            yield from lines
+        else:
+            pending.append(lines[0])
+    pending.append(decoder.decode(b"", final=True))
+    yield "".join(pending)
+
+
+def _merge_line_ranges(line_ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Sort (start, end) ranges and merge overlapping or adjacent ones."""
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(r for r in line_ranges if r[0] <= r[1]):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@dataclass(slots=True)
 class DiffLine:
     """A single line from a diff."""
 
@@ -32,7 +109,7 @@ class DiffLine:
         return self.line_type == " "
 
 
-@dataclass
+@dataclass(slots=True)
 class DiffHunk:
     """A hunk from a unified diff."""
 
@@ -57,7 +134,7 @@ class DiffHunk:
         return result
 
 
-@dataclass
+@dataclass(slots=True)
 class FileDiff:
     """Complete diff for a single file."""
 
@@ -78,52 +155,207 @@ class PatchGenerator:
 
     def __init__(self, repo_path: str | Path):
         self.repo_path = Path(repo_path)
+        # Long-lived `git cat-file --batch` for get_blob_at_ref, started on first use
+        self._cat_file: subprocess.Popen | None = None
+        self._cat_file_lock = threading.Lock()
+        # (base sha, source sha, paths) -> parsed diff, reused across re-executions
+        self._parsed_diffs: dict[tuple[str, str, tuple[str, ...] | None], list[FileDiff]] = {}
+
+    def close(self) -> None:
+        """Stop the cat-file process, if one was started."""
+        with self._cat_file_lock:
+            if self._cat_file is not None:
+                self._cat_file.stdin.close()
+                self._cat_file.wait()
+                self._cat_file.stdout.close()
+                self._cat_file = None
+
+    def __del__(self) -> None:
+        self.close()
+
+    def get_full_diff(
+        self,
+        base_ref: str,
+        source_ref: str,
+        paths: list[str] | None = None,
+    ) -> bytes:
+        """
+        Get the full diff between two refs, as git's raw output.
+
+        If paths is given, only those files (matched literally) are diffed.
+        """
+        if paths is not None and not paths:
+            return b""
 
-    def get_full_diff(self, base_ref: str, source_ref: str) -> str:
-        """Get the full diff between two refs."""
         result = subprocess.run(
-            ["git", "diff", base_ref, source_ref],
+            _full_diff_command(base_ref, source_ref, paths),
             cwd=self.repo_path,
             capture_output=True,
-            text=True,
             check=True,
         )
         return result.stdout
 
-    def parse_diff(self, diff_text: str) -> list[FileDiff]:
+    def get_parsed_diff(
+        self,
+        base_ref: str,
+        source_ref: str,
+        paths: list[str] | None = None,
+    ) -> list[FileDiff]:
+        """
+        Get the parsed diff between two refs, cached per resolved commit pair.
+
+        If paths is given, only those files are diffed and parsed. The returned
+        FileDiffs are shared between calls; treat them as read-only.
+        """
+        result = subprocess.run(
+            ["git", "rev-parse", f"{base_ref}^{{commit}}", f"{source_ref}^{{commit}}"],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        base_sha, source_sha = result.stdout.split()
+
+        if paths is not None and len(paths) > _PATHSPEC_LIMIT:
+            paths = None
+        path_key = tuple(sorted(set(paths))) if paths is not None else None
+        key = (base_sha, source_sha, path_key)
+
+        files = self._parsed_diffs.get(key)
+        if files is None:
+            diff_paths = None
+            if path_key is not None:
+                # A pathspec with only a rename's new path hides its source, and
+                # the file then parses as a whole-file creation
+                diff_paths = [
+                    *path_key, *self._rename_sources(base_sha, source_sha, path_key)
+                ]
+            files = self._stream_parsed_diff(base_sha, source_sha, diff_paths)
+            self._parsed_diffs[key] = files
+        return files
+
+    def _rename_sources(
+        self, base_ref: str, source_ref: str, paths: tuple[str, ...]
+    ) -> list[str]:
+        """Old paths of the files renamed to one of paths between the refs."""
+        result = subprocess.run(
+            [
+                "git", "diff", "--name-status", "-M", "--diff-filter=R", "-z",
+                base_ref, source_ref,
+            ],
+            cwd=self.repo_path,
+            capture_output=True,
+            check=True,
+        )
+        # Records are "R<score>\0<old>\0<new>\0"
+        fields = result.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+        wanted = set(paths)
+        return [
+            fields[i + 1]
+            for i in range(0, len(fields) - 2, 3)
+            if fields[i + 2] in wanted
+        ]
+
+    def _stream_parsed_diff(
+        self,
+        base_ref: str,
+        source_ref: str,
+        paths: list[str] | None,
+    ) -> list[FileDiff]:
+        """Parse git diff output while git is still producing it."""
+        if paths is not None and not paths:
+            return []
+
+        cmd = _full_diff_command(base_ref, source_ref, paths)
+        with subprocess.Popen(
+            cmd,
+            cwd=self.repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ) as proc:
+            files = self._parse_diff_lines(_iter_diff_lines(proc.stdout))
+            stderr = proc.stderr.read()
+
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+        return files
+
+    def parse_diff(self, diff_text: str | bytes) -> list[FileDiff]:
         """Parse a unified diff into structured FileDiff objects."""
+        if isinstance(diff_text, bytes):
+            # One C-level decode; surrogateescape keeps non-UTF-8 bytes intact
+            # so generated patches still match the file on disk
+            diff_text = diff_text.decode("utf-8", errors="surrogateescape")
+
+        # split("\n") rather than splitlines() so a stray \r inside a line
+        # stays part of its content
+        return self._parse_diff_lines(diff_text.split("\n"))
+
+    def _parse_diff_lines(self, lines: Iterable[str]) -> list[FileDiff]:
+        """Parse unified diff lines (without their newlines) into FileDiffs."""
         files = []
         current_file = None
         current_hunk = None
+        old_num = new_num = 0
+        # Short lines (blank, braces, indentation) repeat a lot; share one
+        # string per distinct value
+        intern = {}.setdefault
+
+        # Dispatch on the first character
+        for line in lines:
+            tag = line[:1]
+
+            # Diff content lines (only inside a hunk), numbered as they are read
+            if tag == " " or tag == "+" or tag == "-":
+                if not current_hunk:
+                    continue
+                content = line[1:]
+                if len(content) < _INTERN_MAX_LEN:
+                    content = intern(content, content)
+
+                if tag == " ":
+                    current_hunk.lines.append(DiffLine(content, tag, old_num, new_num))
+                    old_num += 1
+                    new_num += 1
+                elif tag == "+":
+                    current_hunk.lines.append(DiffLine(content, tag, None, new_num))
+                    new_num += 1
+                else:
+                    current_hunk.lines.append(DiffLine(content, tag, old_num, None))
+                    old_num += 1
 
-        lines = diff_text.split("\n")
-        i = 0
+            # Hunk header
+            elif tag == "@":
+                if not line.startswith("@@"):
+                    continue
+                if current_hunk and current_file:
+                    current_file.hunks.append(current_hunk)
 
-        while i < len(lines):
-            line = lines[i]
+                # Parse @@ -old_start,old_count +new_start,new_count @@
+                counts = _parse_hunk_header(line)
+                if counts:
+                    current_hunk = DiffHunk(*counts, header=line)
+                    old_num = current_hunk.old_start
+                    new_num = current_hunk.new_start
 
             # New file diff header
-            if line.startswith("diff --git"):
+            elif line.startswith("diff --git"):
                 if current_file:
                     if current_hunk:
                         current_file.hunks.append(current_hunk)
                     files.append(current_file)
 
-                # Parse paths from "diff --git a/path b/path"
-                match = re.match(r"diff --git a/(.*) b/(.*)", line)
-                if match:
-                    current_file = FileDiff(
-                        old_path=match.group(1),
-                        new_path=match.group(2),
-                    )
+                # Parse paths from "diff --git a/path b/path"; like a greedy
+                # match, the split is at the last " b/"
+                old_path, sep, new_path = line[13:].rpartition(" b/")
+                if sep and line.startswith("diff --git a/"):
+                    current_file = FileDiff(old_path=old_path, new_path=new_path)
                 else:
                     current_file = FileDiff(old_path="", new_path="")
                 current_hunk = None
-                i += 1
-                continue
 
             # File metadata
-            if current_file:
+            elif current_file:
                 if line.startswith("new file"):
                     current_file.is_new_file = True
                 elif line.startswith("deleted file"):
@@ -131,75 +363,14 @@ class PatchGenerator:
                 elif line.startswith("Binary"):
                     current_file.is_binary = True
 
-            # Hunk header
-            if line.startswith("@@"):
-                if current_hunk and current_file:
-                    current_file.hunks.append(current_hunk)
-
-                # Parse @@ -old_start,old_count +new_start,new_count @@
-                match = re.match(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)", line)
-                if match:
-                    current_hunk = DiffHunk(
-                        old_start=int(match.group(1)),
-                        old_count=int(match.group(2)) if match.group(2) else 1,
-                        new_start=int(match.group(3)),
-                        new_count=int(match.group(4)) if match.group(4) else 1,
-                        header=line,
-                    )
-                i += 1
-                continue
-
-            # Diff content lines
-            if current_hunk and line:
-                if line.startswith("+") and not line.startswith("+++"):
-                    current_hunk.lines.append(DiffLine(
-                        content=line[1:],  # Remove the + prefix
-                        line_type="+",
-                    ))
-                elif line.startswith("-") and not line.startswith("---"):
-                    current_hunk.lines.append(DiffLine(
-                        content=line[1:],  # Remove the - prefix
-                        line_type="-",
-                    ))
-                elif line.startswith(" "):
-                    current_hunk.lines.append(DiffLine(
-                        content=line[1:],  # Remove the space prefix
-                        line_type=" ",
-                    ))
-
-            i += 1
-
         # Don't forget the last file/hunk
         if current_file:
             if current_hunk:
                 current_file.hunks.append(current_hunk)
             files.append(current_file)
 
-        # Assign line numbers to each diff line
-        for file_diff in files:
-            for hunk in file_diff.hunks:
-                self._assign_line_numbers(hunk)
-
         return files
 
-    def _assign_line_numbers(self, hunk: DiffHunk) -> None:
-        """Assign old and new line numbers to each line in a hunk."""
-        old_num = hunk.old_start
-        new_num = hunk.new_start
-
-        for line in hunk.lines:
-            if line.is_context:
-                line.old_line_num = old_num
-                line.new_line_num = new_num
-                old_num += 1
-                new_num += 1
-            elif line.is_deletion:
-                line.old_line_num = old_num
-                old_num += 1
-            elif line.is_addition:
-                line.new_line_num = new_num
-                new_num += 1
-
     def generate_patch_for_lines(
         self,
         file_diff: FileDiff,
@@ -222,13 +393,18 @@ class PatchGenerator:
         if file_diff.is_new_file:
             return self._generate_full_file_patch(file_diff)
 
-        # Build patch header
-        patch_lines = [
-            f"--- a/{file_diff.old_path}",
-            f"+++ b/{file_diff.new_path}",
-        ]
+        # Build patch header; hunks write straight into the same buffer
+        out = [f"--- a/{file_diff.old_path}\n+++ b/{file_diff.new_path}\n"]
+        if file_diff.old_path != file_diff.new_path:
+            # git apply only moves the file when the rename is spelled out
+            out.insert(0, (
+                f"diff --git a/{file_diff.old_path} b/{file_diff.new_path}\n"
+                f"rename from {file_diff.old_path}\nrename to {file_diff.new_path}\n"
+            ))
 
         hunks_added = 0
+        # Sorted and disjoint, as _filter_hunk_for_ranges expects
+        line_ranges = _merge_line_ranges(line_ranges)
 
         for hunk in file_diff.hunks:
             # Check if this hunk overlaps with any of our ranges
@@ -236,15 +412,13 @@ class PatchGenerator:
 
             if hunk_lines:
                 # Generate hunk header and content
-                hunk_patch = self._generate_hunk_patch(hunk, hunk_lines)
-                if hunk_patch:
-                    patch_lines.extend(hunk_patch)
-                    hunks_added += 1
+                self._generate_hunk_patch(hunk, hunk_lines, out)
+                hunks_added += 1
 
         if hunks_added == 0:
             return None
 
-        return "\n".join(patch_lines) + "\n"
+        return "".join(out)
 
     def _filter_hunk_for_ranges(
         self,
@@ -253,56 +427,59 @@ class PatchGenerator:
     ) -> list[DiffLine]:
         """Filter hunk lines to only include those in the specified ranges.
 
-        Line ranges reference the NEW file (feature branch). For additions, we check
+        Line ranges must be sorted and disjoint (see _merge_line_ranges) and
+        reference the NEW file (feature branch). For additions, we check
         new_line_num directly. For deletions (which don't exist in the new file),
         we include them if they're adjacent to additions that ARE in range.
         """
         # First pass: mark which lines are directly in range (additions only)
-        # and compute virtual new line numbers for deletions
-        in_range_indices: set[int] = set()
+        # and compute virtual new line numbers for deletions. The mark is one
+        # byte per line rather than a set of indices.
+        in_range = bytearray(len(hunk.lines))
 
         # Compute virtual new line numbers for all lines
         # Deletions get the new_line_num of the nearest context/addition
-        virtual_new_nums: list[int | None] = []
+        # (never None, since deletions inherit the last known number)
+        virtual_new_nums: list[int] = []
         last_new_num = hunk.new_start
 
         for line in hunk.lines:
             if line.new_line_num is not None:
                 last_new_num = line.new_line_num
-                virtual_new_nums.append(line.new_line_num)
-            else:
-                # Deletion - use the last known new line number
-                virtual_new_nums.append(last_new_num)
+            virtual_new_nums.append(last_new_num)
 
         # Mark additions and deletions that are in range
-        for i, line in enumerate(hunk.lines):
-            virtual_num = virtual_new_nums[i]
-            if virtual_num is None:
-                continue
-
-            for start, end in line_ranges:
-                if start <= virtual_num <= end:
-                    in_range_indices.add(i)
-                    break
+        if line_ranges:
+            # Virtual numbers never decrease, so walk the sorted ranges in
+            # step with the lines; a range is left once a line passes its end
+            last_range = len(line_ranges) - 1
+            range_idx = 0
+            lo, hi = line_ranges[0]
+            for i, virtual_num in enumerate(virtual_new_nums):
+                while virtual_num > hi and range_idx < last_range:
+                    range_idx += 1
+                    lo, hi = line_ranges[range_idx]
+                if lo <= virtual_num <= hi:
+                    in_range[i] = 1
 
         # If no changes in range, return empty
-        if not in_range_indices:
+        if 1 not in in_range:
             return []
 
         # Second pass: build result with proper context
         result = []
-        context_before: list[DiffLine] = []
+        # Only the last 3 pending context lines can ever be used
+        context_before: deque[DiffLine] = deque(maxlen=3)
         last_included_idx = -1
 
         for i, line in enumerate(hunk.lines):
-            if i in in_range_indices:
-                # Include up to 3 context lines before
-                for ctx in context_before[-3:]:
-                    if ctx not in result:
-                        result.append(ctx)
+            if in_range[i]:
+                # Include up to 3 context lines before; these were never
+                # appended to result, so no membership check is needed
+                result.extend(context_before)
                 result.append(line)
                 last_included_idx = len(result) - 1
-                context_before = []
+                context_before.clear()
             elif line.is_context:
                 if result and len(result) - 1 - last_included_idx < 3:
                     # Include context after included changes (up to 3 lines)
@@ -316,40 +493,46 @@ class PatchGenerator:
         self,
         original_hunk: DiffHunk,
         filtered_lines: list[DiffLine],
-    ) -> list[str] | None:
-        """Generate a valid hunk from filtered lines."""
-        if not filtered_lines:
-            return None
-
-        # Calculate line counts
-        old_count = sum(1 for l in filtered_lines if l.is_context or l.is_deletion)
-        new_count = sum(1 for l in filtered_lines if l.is_context or l.is_addition)
+        out: list[str],
+    ) -> None:
+        """Append a valid hunk built from non-empty filtered lines to out."""
+        # One pass writes the lines and gathers everything the header needs;
+        # the header goes into the slot reserved ahead of them
+        write = out.append
+        header_idx = len(out)
+        write("")
+
+        old_count = new_count = 0
+        context_start = None  # (old, new) of the first context line
+        first_old = first_new = None
 
-        # Find the starting line numbers - need both old and new
-        # For a valid hunk, we need correlated old/new start positions
-        old_start = None
-        new_start = None
-
-        # First, try to find a context line (has both old and new)
         for line in filtered_lines:
-            if line.is_context and line.old_line_num and line.new_line_num:
-                old_start = line.old_line_num
-                new_start = line.new_line_num
-                break
-
-        # If no context, calculate from first addition/deletion
-        if old_start is None or new_start is None:
-            # Find first line with known position
-            first_old = None
-            first_new = None
-            for line in filtered_lines:
-                if first_old is None and line.old_line_num:
-                    first_old = line.old_line_num
-                if first_new is None and line.new_line_num:
-                    first_new = line.new_line_num
-
-            # Calculate correlation from original hunk
-            # The offset between old and new should be preserved
+            line_type = line.line_type
+            if line_type == " ":
+                old_count += 1
+                new_count += 1
+                if context_start is None and line.old_line_num and line.new_line_num:
+                    context_start = (line.old_line_num, line.new_line_num)
+            elif line_type == "-":
+                old_count += 1
+            else:
+                new_count += 1
+            if first_old is None and line.old_line_num:
+                first_old = line.old_line_num
+            if first_new is None and line.new_line_num:
+                first_new = line.new_line_num
+
+            # line_type is the line's diff prefix
+            write(line_type)
+            write(line.content)
+            write("\n")
+
+        # For a valid hunk, we need correlated old/new start positions:
+        # prefer a context line, which has both
+        if context_start is not None:
+            old_start, new_start = context_start
+        else:
+            # Otherwise preserve the original hunk's old/new offset
             offset = original_hunk.new_start - original_hunk.old_start
 
             if first_old is not None and first_new is None:
@@ -365,90 +548,100 @@ class PatchGenerator:
                 old_start = original_hunk.old_start
                 new_start = original_hunk.new_start
 
-        # Build the hunk
-        result = [f"@@ -{old_start},{old_count} +{new_start},{new_count} @@"]
-
-        for line in filtered_lines:
-            if line.is_addition:
-                result.append(f"+{line.content}")
-            elif line.is_deletion:
-                result.append(f"-{line.content}")
-            else:
-                result.append(f" {line.content}")
-
-        return result
+        out[header_idx] = f"@@ -{old_start},{old_count} +{new_start},{new_count} @@\n"
 
     def _generate_full_file_patch(self, file_diff: FileDiff) -> str:
         """Generate a patch for an entire new file."""
-        lines = [
-            f"--- /dev/null",
-            f"+++ b/{file_diff.new_path}",
-        ]
+        out = [f"--- /dev/null\n+++ b/{file_diff.new_path}\n"]
+        write = out.append
 
         for hunk in file_diff.hunks:
-            lines.append(hunk.header)
+            write(hunk.header)
+            write("\n")
             for line in hunk.lines:
-                if line.is_addition:
-                    lines.append(f"+{line.content}")
-                elif line.is_deletion:
-                    lines.append(f"-{line.content}")
-                else:
-                    lines.append(f" {line.content}")
+                write(line.line_type)
+                write(line.content)
+                write("\n")
 
-        return "\n".join(lines) + "\n"
+        return "".join(out)
 
-    def apply_patch(self, patch: str) -> bool:
+    def apply_patch(self, patch: str | bytes) -> bool:
         """Apply a patch to the working directory."""
         if not patch.strip():
             return True
+        return self.apply_patches([patch])[0]
 
-        try:
-            # First, check if patch applies cleanly
-            result = subprocess.run(
-                ["git", "apply", "--check"],
-                cwd=self.repo_path,
-                input=patch,
-                capture_output=True,
-                text=True,
-            )
-
-            if result.returncode != 0:
-                # Try with more lenient options
-                result = subprocess.run(
-                    ["git", "apply", "--check", "-3"],  # 3-way merge
-                    cwd=self.repo_path,
-                    input=patch,
-                    capture_output=True,
-                    text=True,
-                )
+    def apply_patches(self, patches: list[str | bytes]) -> list[bool]:
+        """
+        Apply several patches, returning whether each one applied.
 
-            if result.returncode != 0:
-                return False
+        All patches go to a single `git apply`. git apply is all-or-nothing,
+        so on failure the list is split in half and each half retried, which
+        isolates the failing patches while the rest still apply. Patches
+        already encoded as bytes are passed through without re-encoding.
+        """
+        if not patches:
+            return []
 
-            # Apply the patch
-            subprocess.run(
-                ["git", "apply"],
-                cwd=self.repo_path,
-                input=patch,
-                check=True,
-                text=True,
-            )
-            return True
+        result = subprocess.run(
+            ["git", "apply"],
+            cwd=self.repo_path,
+            input=b"".join(
+                patch if isinstance(patch, bytes)
+                else patch.encode("utf-8", errors="surrogateescape")
+                for patch in patches
+            ),
+            capture_output=True,
+        )
+        if result.returncode == 0:
+            return [True] * len(patches)
+        if len(patches) == 1:
+            return [False]
 
-        except subprocess.CalledProcessError:
-            return False
+        mid = len(patches) // 2
+        return self.apply_patches(patches[:mid]) + self.apply_patches(patches[mid:])
 
     def get_file_at_ref(self, path: str, ref: str) -> str | None:
         """Get file contents at a specific ref."""
-        try:
+        data = self.get_blob_at_ref(path, ref)
+        if data is None:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def get_blob_at_ref(self, path: str, ref: str) -> bytes | None:
+        """Get the raw bytes of a file at a specific ref."""
+        if "\n" in path:
+            # The batch protocol is line-based; fall back to a one-off git show
             result = subprocess.run(
                 ["git", "show", f"{ref}:{path}"],
                 cwd=self.repo_path,
                 capture_output=True,
-                text=True,
             )
-            if result.returncode == 0:
-                return result.stdout
-            return None
-        except subprocess.CalledProcessError:
+            if result.returncode != 0:
+                return None
+            return result.stdout
+
+        with self._cat_file_lock:
+            if self._cat_file is None:
+                self._cat_file = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    cwd=self.repo_path,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            proc = self._cat_file
+
+            proc.stdin.write(f"{ref}:{path}\n".encode("utf-8"))
+            proc.stdin.flush()
+
+            # "<sha> <type> <size>\n<content>\n", or "<object> missing\n" where
+            # the object name may itself contain spaces
+            header = proc.stdout.readline().rstrip(b"\n").rsplit(b" ", 2)
+            if len(header) != 3 or not header[2].isdigit():
+                return None
+            data = proc.stdout.read(int(header[2]) + 1)[:-1]
+
+        if header[1] != b"blob":
             return None
+        return data
@@ -1,12 +1,41 @@
 """Phase 1: Intent Discovery - Analyze changes and identify logical intents."""
 
-import subprocess
+import ast
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate, islice
+from operator import attrgetter
 
 from gitsplit.ai import AIClient, AIError, INTENT_DISCOVERY_SYSTEM, parse_json_response
 from gitsplit.git import GitOperations, FileDiff
 from gitsplit.models import Intent, FileChange, LineRange, Session
 
 
+# Unchanged lines shown around each hunk in the diff sent to the AI. Hunk
+# headers still carry exact line numbers, so one line of context is enough to
+# place a change while keeping the prompt (and its token cost) small.
+_PROMPT_CONTEXT_LINES = 1
+
+# Statements whose full extent a line range is expanded to cover
+_BLOCK_NODE_TYPES = (
+    # Function or class definitions
+    ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef,
+    # Control structures
+    ast.If, ast.For, ast.While, ast.With, ast.Try,
+)
+
+
+def _file_status(fd: FileDiff) -> str:
+    """Parenthesized status suffix for a file in the changes summary."""
+    if fd.is_new:
+        return " (new file)"
+    if fd.is_deleted:
+        return " (deleted)"
+    if fd.is_renamed:
+        return f" (renamed from {fd.old_path})"
+    return ""
+
+
 class DiscoveryError(Exception):
     """Intent discovery failed."""
 
@@ -20,6 +49,9 @@ class IntentDiscovery:
         self.git = git
         self.ai = ai
         self.session = session
+        # Block starts and running max ends by (HEAD commit, path), or None for
+        # files that can't be parsed; HEAD rarely moves during discovery
+        self._block_cache: dict[tuple[str, str], tuple[list[int], list[int]] | None] = {}
 
     def discover(self, hint: str | None = None) -> list[Intent]:
         """
@@ -32,7 +64,9 @@ class IntentDiscovery:
             List of discovered intents
         """
         # Get the diff
-        diff = self.git.get_raw_diff(self.session.base_branch)
+        diff = self.git.get_raw_diff(
+            self.session.base_branch, context_lines=_PROMPT_CONTEXT_LINES
+        )
         file_diffs = self.git.get_diff(self.session.base_branch)
 
         if not diff.strip():
@@ -51,6 +85,7 @@ class IntentDiscovery:
                 temperature=0.0,
                 max_tokens=4096,
                 use_conversation=True,
+                validate=parse_json_response,
             )
         except AIError as e:
             raise DiscoveryError(f"AI analysis failed: {e}")
@@ -66,8 +101,7 @@ class IntentDiscovery:
 
         # Update session
         self.session.discovered_intents = intents
-        self.session.total_tokens_used += response.input_tokens + response.output_tokens
-        self.session.total_cost += response.cost
+        self.session.add_usage(response)
 
         return intents
 
@@ -89,6 +123,7 @@ class IntentDiscovery:
                 temperature=0.0,
                 max_tokens=4096,
                 use_conversation=True,
+                validate=parse_json_response,
             )
         except AIError as e:
             raise DiscoveryError(f"AI analysis failed on retry: {e}")
@@ -101,8 +136,7 @@ class IntentDiscovery:
         intents = self._parse_intents(result, file_diffs)
 
         self.session.discovered_intents = intents
-        self.session.total_tokens_used += response.input_tokens + response.output_tokens
-        self.session.total_cost += response.cost
+        self.session.add_usage(response)
 
         return intents
 
@@ -119,17 +153,11 @@ class IntentDiscovery:
         parts.append("## Changes Summary\n")
         parts.append(f"Total files changed: {len(file_diffs)}\n")
 
-        for fd in file_diffs:
-            status = ""
-            if fd.is_new:
-                status = " (new file)"
-            elif fd.is_deleted:
-                status = " (deleted)"
-            elif fd.is_renamed:
-                status = f" (renamed from {fd.old_path})"
-
-            parts.append(f"- {fd.path}{status}: +{fd.additions} -{fd.deletions}\n")
-
+        # One joined block rather than a list entry per file
+        parts.append("".join(
+            f"- {fd.path}{_file_status(fd)}: +{fd.additions} -{fd.deletions}\n"
+            for fd in file_diffs
+        ))
         parts.append("\n")
 
         # User hint if provided
@@ -150,6 +178,7 @@ class IntentDiscovery:
     ) -> list[Intent]:
         """Parse AI response into Intent objects."""
         intents = []
+        diffs_by_path = {fd.path: fd for fd in file_diffs}
 
         for i, intent_data in enumerate(result.get("intents", [])):
             intent_id = intent_data.get("id", f"intent-{chr(ord('a') + i)}")
@@ -159,15 +188,14 @@ class IntentDiscovery:
                 path = file_data.get("path", "")
 
                 # Find matching file diff for stats
-                matching_diff = next(
-                    (fd for fd in file_diffs if fd.path == path),
-                    None,
-                )
+                matching_diff = diffs_by_path.get(path)
 
                 line_ranges = []
+                total_lines = 0
                 for lr in file_data.get("line_ranges", []):
                     if isinstance(lr, list) and len(lr) >= 2:
                         line_ranges.append(LineRange(lr[0], lr[1]))
+                        total_lines += lr[1] - lr[0] + 1
 
                 is_entire_file = file_data.get("is_entire_file", False)
 
@@ -180,7 +208,6 @@ class IntentDiscovery:
                         deletions = matching_diff.deletions
                     else:
                         # Estimate based on line ranges
-                        total_lines = sum(lr.end - lr.start + 1 for lr in line_ranges)
                         ratio = total_lines / max(
                             matching_diff.additions + matching_diff.deletions, 1
                         )
@@ -227,49 +254,75 @@ class IntentDiscovery:
 
         This ensures we don't cut off function bodies or control structures mid-way.
         """
-        import ast
-
-        for intent in intents:
-            for fc in intent.files:
-                if fc.is_entire_file or not fc.line_ranges:
-                    continue
+        # Only Python files with partial ranges are expanded
+        targets = [
+            fc
+            for intent in intents
+            for fc in intent.files
+            if not fc.is_entire_file and fc.line_ranges and fc.path.endswith(".py")
+        ]
+        if not targets:
+            return intents
+
+        # Parse each file once per HEAD commit, however many intents or
+        # discovery rounds touch it; unseen files are read in one git process
+        head = self.git.repo.head.commit.hexsha
+        missing = [fc.path for fc in targets if (head, fc.path) not in self._block_cache]
+        if missing:
+            for path, source_content in self.git.get_file_contents(missing).items():
+                self._block_cache[(head, path)] = self._index_blocks(source_content)
+
+        for fc in targets:
+            block_index = self._block_cache[(head, fc.path)]
+            if block_index is None:
+                continue
+            starts, max_ends = block_index
 
-                # Only process Python files
-                if not fc.path.endswith(".py"):
-                    continue
+            # Expand each line range to complete blocks
+            expanded_ranges = []
+            for lr in fc.line_ranges:
+                new_start, new_end = lr.start, lr.end
 
-                # Get the source file content
-                source_content = self._get_file_content(fc.path)
-                if not source_content:
-                    continue
+                # Candidates are the blocks starting at or before the range end;
+                # the first of them whose running max end reaches the range
+                # start is the earliest block that overlaps it
+                candidates = bisect_right(starts, lr.end)
+                first = bisect_left(max_ends, lr.start, 0, candidates)
+                if first < candidates:
+                    new_start = min(new_start, starts[first])
+                    new_end = max(new_end, max_ends[candidates - 1])
 
-                # Parse the file to find block boundaries
-                try:
-                    tree = ast.parse(source_content)
-                except SyntaxError:
-                    continue
+                expanded_ranges.append(LineRange(new_start, new_end))
 
-                # Get all block boundaries (functions, classes, control structures)
-                blocks = self._get_block_boundaries(tree, source_content)
+            # Merge adjacent/overlapping ranges and fill small gaps (empty lines)
+            fc.line_ranges = self._merge_ranges_with_gaps(expanded_ranges)
 
-                # Expand each line range to complete blocks
-                expanded_ranges = []
-                for lr in fc.line_ranges:
-                    new_start, new_end = lr.start, lr.end
+        return intents
 
-                    # Find any blocks that overlap with this range and expand to include them
-                    for block_start, block_end in blocks:
-                        # If our range intersects with this block, expand to include it
-                        if (lr.start <= block_end and lr.end >= block_start):
-                            new_start = min(new_start, block_start)
-                            new_end = max(new_end, block_end)
+    def _index_blocks(
+        self,
+        source_content: str | None,
+    ) -> tuple[list[int], list[int]] | None:
+        """
+        Index a file's blocks as (starts, running max ends); None if unparsable.
 
-                    expanded_ranges.append(LineRange(new_start, new_end))
+        Blocks are sorted by start, and the running maximum of their ends never
+        decreases, so both halves of the overlap test can bisect.
+        """
+        if not source_content:
+            return None
 
-                # Merge adjacent/overlapping ranges and fill small gaps (empty lines)
-                fc.line_ranges = self._merge_ranges_with_gaps(expanded_ranges)
+        # Parse the file to find block boundaries
+        try:
+            tree = ast.parse(source_content)
+        except SyntaxError:
+            return None
 
-        return intents
+        # Get all block boundaries (functions, classes, control structures)
+        blocks = self._get_block_boundaries(tree)
+        starts = [block_start for block_start, _ in blocks]
+        max_ends = list(accumulate((block_end for _, block_end in blocks), max))
+        return starts, max_ends
 
     def _merge_ranges_with_gaps(
         self,
@@ -281,62 +334,50 @@ class IntentDiscovery:
 
         This ensures empty lines between functions are included.
         """
-        if not ranges:
+        if len(ranges) < 2:
             return ranges
 
-        # Sort by start
-        sorted_ranges = sorted(ranges, key=lambda r: r.start)
+        # Sort by start; input usually arrives in order, which timsort
+        # handles in a single linear pass
+        sorted_ranges = sorted(ranges, key=attrgetter("start"))
 
-        merged = [sorted_ranges[0]]
-        for lr in sorted_ranges[1:]:
-            prev = merged[-1]
+        # Extend a run until the next range falls outside it, creating a new
+        # LineRange only for runs that actually grew
+        merged = []
+        run = sorted_ranges[0]
+        run_end = run.end
+        for lr in islice(sorted_ranges, 1, None):
             # If this range starts within max_gap lines of previous end, merge them
-            if lr.start <= prev.end + max_gap + 1:
-                merged[-1] = LineRange(prev.start, max(prev.end, lr.end))
+            if lr.start <= run_end + max_gap + 1:
+                run_end = max(run_end, lr.end)
             else:
-                merged.append(lr)
+                merged.append(run if run_end == run.end else LineRange(run.start, run_end))
+                run, run_end = lr, lr.end
+        merged.append(run if run_end == run.end else LineRange(run.start, run_end))
 
         return merged
 
-    def _get_file_content(self, path: str) -> str | None:
-        """Get file content from the current branch."""
-        try:
-            result = subprocess.run(
-                ["git", "show", f"HEAD:{path}"],
-                cwd=self.git.repo_path,
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode == 0:
-                return result.stdout
-        except subprocess.CalledProcessError:
-            pass
-        return None
-
     def _get_block_boundaries(
         self,
-        tree: "ast.AST",
-        source: str,
+        tree: ast.Module,
     ) -> list[tuple[int, int]]:
-        """Get (start_line, end_line) for all code blocks in an AST."""
-        import ast
-
+        """Get (start_line, end_line) for all code blocks in an AST, sorted by start."""
         blocks = []
-        source_lines = source.split("\n")
 
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                # Function or class definition
+        # Blocks are statements, and statements only nest inside the statement
+        # lists below, so expressions are never visited
+        stack = list(tree.body)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _BLOCK_NODE_TYPES):
                 start = node.lineno
                 end = node.end_lineno or start
                 blocks.append((start, end))
 
-            elif isinstance(node, (ast.If, ast.For, ast.While, ast.With, ast.Try)):
-                # Control structures
-                start = node.lineno
-                end = node.end_lineno or start
-                blocks.append((start, end))
+            for field in ("body", "orelse", "finalbody", "handlers", "cases"):
+                stack.extend(getattr(node, field, ()))
 
+        blocks.sort()
         return blocks
 
     def _fix_overlapping_ranges(self, intents: list[Intent]) -> list[Intent]:
@@ -346,47 +387,40 @@ class IntentDiscovery:
         If two intents claim overlapping lines in the same file,
         assign those lines to the first intent and remove from the second.
         """
-        # Build a map of file -> list of (intent_idx, range) sorted by start
-        file_ranges: dict[str, list[tuple[int, int, int, int]]] = {}  # path -> [(intent_idx, range_idx, start, end)]
+        # Build a map of file -> list of (start, intent_idx, range, owning FileChange)
+        file_ranges: dict[str, list[tuple[int, int, LineRange, FileChange]]] = {}
 
         for intent_idx, intent in enumerate(intents):
             for fc in intent.files:
                 if fc.is_entire_file:
                     continue
-                for range_idx, lr in enumerate(fc.line_ranges):
-                    if fc.path not in file_ranges:
-                        file_ranges[fc.path] = []
-                    file_ranges[fc.path].append((intent_idx, range_idx, lr.start, lr.end))
+                file_ranges.setdefault(fc.path, []).extend(
+                    (lr.start, intent_idx, lr, fc) for lr in fc.line_ranges
+                )
 
-        # For each file, check for overlaps
-        for path, ranges in file_ranges.items():
+        # For each file, sweep the ranges by start line and rebuild every
+        # FileChange's list, so no stored index can go stale mid-fix
+        for ranges in file_ranges.values():
             if len(ranges) < 2:
                 continue
 
-            # Sort by start line
-            ranges.sort(key=lambda x: x[2])
-
-            # Detect overlaps
-            for i in range(len(ranges) - 1):
-                curr_intent, curr_range_idx, curr_start, curr_end = ranges[i]
-                next_intent, next_range_idx, next_start, next_end = ranges[i + 1]
-
-                # Check if current range overlaps with next
-                if curr_end >= next_start and curr_intent != next_intent:
-                    # Overlap detected - adjust the second range
-                    new_start = curr_end + 1
-                    if new_start <= next_end:
-                        # Update the range
-                        fc = intents[next_intent].files
-                        for f in fc:
-                            if f.path == path and len(f.line_ranges) > next_range_idx:
-                                f.line_ranges[next_range_idx] = LineRange(new_start, next_end)
-                    else:
-                        # Range is completely consumed - remove it
-                        fc = intents[next_intent].files
-                        for f in fc:
-                            if f.path == path and len(f.line_ranges) > next_range_idx:
-                                f.line_ranges.pop(next_range_idx)
+            # Sort by start line; on ties the earlier intent claims the lines
+            ranges.sort(key=lambda x: (x[0], x[1]))
+            for fc in {id(r[3]): r[3] for r in ranges}.values():
+                fc.line_ranges = []
+
+            # Every line up to claimed_end already belongs to an earlier range
+            claimed_end = 0
+            for start, _, lr, fc in ranges:
+                if start <= claimed_end:
+                    # Overlap detected - keep only the part after the claimed lines
+                    if claimed_end >= lr.end:
+                        # Range is completely consumed - drop it
+                        continue
+                    lr = LineRange(claimed_end + 1, lr.end)
+
+                fc.line_ranges.append(lr)
+                claimed_end = lr.end
 
         return intents
 
@@ -402,24 +436,21 @@ class IntentDiscovery:
         This avoids line number misattribution issues.
         """
         # Count how many intents touch each file
-        file_intent_count: dict[str, int] = {}
-        for intent in intents:
-            for fc in intent.files:
-                file_intent_count[fc.path] = file_intent_count.get(fc.path, 0) + 1
+        file_intent_count = Counter(fc.path for intent in intents for fc in intent.files)
+        if 1 not in file_intent_count.values():
+            return intents
 
         # For files touched by only one intent, use is_entire_file
+        diffs_by_path = {fd.path: fd for fd in file_diffs}
         for intent in intents:
             for fc in intent.files:
-                if file_intent_count.get(fc.path, 0) == 1 and not fc.is_entire_file:
+                if file_intent_count[fc.path] == 1 and not fc.is_entire_file:
                     # This file is only in this intent - use entire file
                     fc.is_entire_file = True
                     fc.line_ranges = []
 
                     # Update stats to full file stats
-                    matching_diff = next(
-                        (fd for fd in file_diffs if fd.path == fc.path),
-                        None,
-                    )
+                    matching_diff = diffs_by_path.get(fc.path)
                     if matching_diff:
                         fc.additions = matching_diff.additions
                         fc.deletions = matching_diff.deletions
@@ -443,8 +474,18 @@ class IntentDiscovery:
         Returns:
             Updated list of intents
         """
-        # Get the diff
-        diff = self.git.get_raw_diff(self.session.base_branch)
+        # Get the diff, leaving out files owned by preserved intents
+        preserved_files = [
+            f.path
+            for intent in self.session.discovered_intents
+            if intent.id in preserved_intents
+            for f in intent.files
+        ]
+        diff = self.git.get_raw_diff(
+            self.session.base_branch,
+            context_lines=_PROMPT_CONTEXT_LINES,
+            exclude=preserved_files,
+        )
         file_diffs = self.git.get_diff(self.session.base_branch)
 
         # Build context with error information and add to conversation
@@ -459,6 +500,7 @@ class IntentDiscovery:
                 temperature=0.0,
                 max_tokens=4096,
                 use_conversation=True,
+                validate=parse_json_response,
             )
         except AIError as e:
             raise DiscoveryError(f"AI analysis failed: {e}")
@@ -477,8 +519,7 @@ class IntentDiscovery:
 
         # Update session
         self.session.discovered_intents = final_intents
-        self.session.total_tokens_used += response.input_tokens + response.output_tokens
-        self.session.total_cost += response.cost
+        self.session.add_usage(response)
 
         return final_intents
 
@@ -514,9 +555,11 @@ class IntentDiscovery:
                 preserved_files.update(f.path for f in intent.files)
 
         parts.append("## Remaining Changes to Analyze\n")
-        for fd in file_diffs:
-            if fd.path not in preserved_files:
-                parts.append(f"- {fd.path}: +{fd.additions} -{fd.deletions}\n")
+        parts.append("".join(
+            f"- {fd.path}: +{fd.additions} -{fd.deletions}\n"
+            for fd in file_diffs
+            if fd.path not in preserved_files
+        ))
 
         parts.append("\n## Full Diff\n```diff\n")
         parts.append(diff)
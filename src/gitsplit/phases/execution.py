@@ -1,7 +1,9 @@
 """Phase 3: Execution - Create branches, apply changes, create PRs."""
 
+import json
 import re
 import subprocess
+from dataclasses import replace
 from typing import Any, Callable
 
 from gitsplit.git import GitOperations, GitError
@@ -9,6 +11,11 @@ from gitsplit.models import Intent, ChangePlan, Session, SessionPhase, FileChang
 from gitsplit.verification import Verifier, VerificationResult
 from gitsplit.patch import PatchGenerator, FileDiff
 
+# Branch-name slug patterns, applied in order by _generate_branch_name
+_NON_SLUG_RE = re.compile(r"[^\w\s-]")
+_SEPARATOR_RE = re.compile(r"[\s_]+")
+_DASH_RUN_RE = re.compile(r"-+")
+
 
 class ExecutionError(Exception):
     """Execution failed."""
@@ -30,6 +37,10 @@ class Executor:
         self.session = session
         self.patch_gen = PatchGenerator(git.repo_path)
 
+    def close(self) -> None:
+        """Stop the patch generator's persistent git process."""
+        self.patch_gen.close()
+
     def execute(
         self,
         plan: ChangePlan,
@@ -51,15 +62,26 @@ class Executor:
         intents_by_id = {i.id: i for i in plan.intents}
         total = len(plan.execution_order)
 
-        # Parse the full diff once - we'll use this to generate patches
+        # Parse the diff once - we'll use this to generate patches. Only files
+        # split by line range need hunks; whole files are copied from source.
         base_branch = self.session.base_branch
-        full_diff = self.patch_gen.get_full_diff(base_branch, original_branch)
-        parsed_diffs = self.patch_gen.parse_diff(full_diff)
+        patched_paths = [
+            fc.path
+            for intent in plan.intents
+            for fc in intent.files
+            if fc.line_ranges and not fc.is_entire_file
+        ]
+        parsed_diffs = self.patch_gen.get_parsed_diff(
+            base_branch, original_branch, patched_paths
+        )
         diffs_by_path = {d.path: d for d in parsed_diffs}
 
         # Track the previous branch for stacking
         previous_branch = base_branch
         created_branches = []
+        # (step, intent, branch, PR base) whose PRs are opened once all are built
+        pending_prs: list[tuple[int, Intent, str, str]] = []
+        create_prs = not self.session.no_pr and self.git.has_remote()
 
         try:
             for step, intent_id in enumerate(plan.execution_order, 1):
@@ -96,12 +118,9 @@ class Executor:
                         if not success:
                             raise ExecutionError(f"Build failed for {branch_name}: {output}")
 
-                    # Create PR if needed
-                    if not self.session.no_pr and self.git.has_remote():
-                        if on_progress:
-                            on_progress(step, total, branch_name, "pushing")
-
-                        self._push_and_create_pr(intent, branch_name, previous_branch)
+                    # Create PR if needed, after every branch is built
+                    if create_prs:
+                        pending_prs.append((step, intent, branch_name, previous_branch))
 
                     if on_progress:
                         on_progress(step, total, branch_name, "done")
@@ -123,6 +142,18 @@ class Executor:
                     final_hash=original_hash,
                 )
 
+            # Publish only a split that verified
+            if pending_prs and result.passed:
+                if on_progress:
+                    for step, _, branch_name, _ in pending_prs:
+                        on_progress(step, total, branch_name, "pushing")
+
+                self._push_and_create_prs(pending_prs)
+
+                if on_progress:
+                    for step, _, branch_name, _ in pending_prs:
+                        on_progress(step, total, branch_name, "done")
+
             return result
 
         except Exception as e:
@@ -141,9 +172,9 @@ class Executor:
     def _generate_branch_name(self, intent: Intent) -> str:
         """Generate a branch name from an intent."""
         name = intent.name.lower()
-        name = re.sub(r"[^\w\s-]", "", name)
-        name = re.sub(r"[\s_]+", "-", name)
-        name = re.sub(r"-+", "-", name)
+        name = _NON_SLUG_RE.sub("", name)
+        name = _SEPARATOR_RE.sub("-", name)
+        name = _DASH_RUN_RE.sub("-", name)
         name = name.strip("-")
 
         if len(name) > 50:
@@ -157,12 +188,8 @@ class Executor:
         branch_name: str,
         base_branch: str,
     ) -> None:
-        """Create a branch for an intent."""
-        if self.git.branch_exists(branch_name):
-            self.git.delete_branch(branch_name, force=True)
-
-        self.git.create_branch(branch_name, base_branch)
-        self.git.checkout_branch(branch_name)
+        """Create a branch for an intent, replacing any stale one of the same name."""
+        self.git.checkout_new_branch(branch_name, base_branch)
 
     def _apply_intent_patches(
         self,
@@ -177,7 +204,12 @@ class Executor:
         - If entire_file: copy the whole file from source
         - If line_ranges: generate and apply a patch for only those lines
         """
-        changes_made = False
+        # Whole files to copy and (path, line_ranges, patch) to apply, each
+        # handled together once all files are seen
+        whole_files: list[str] = []
+        pending: list[tuple[str, list[tuple[int, int]], str]] = []
+        # Old path of each file whose patch also performs its rename
+        rename_sources: dict[str, str] = {}
 
         for file_change in intent.files:
             path = file_change.path
@@ -185,48 +217,78 @@ class Executor:
 
             if file_change.is_entire_file or not file_change.line_ranges:
                 # Copy entire file from source
-                if self._copy_file_from_source(path, source_branch):
-                    changes_made = True
+                whole_files.append(path)
             elif file_diff:
                 # Generate surgical patch for specific line ranges
                 line_ranges = [(lr.start, lr.end) for lr in file_change.line_ranges]
+                if file_diff.old_path != path:
+                    if (self.git.repo_path / file_diff.old_path).exists():
+                        rename_sources[path] = file_diff.old_path
+                    else:
+                        # An earlier intent already moved the renamed file
+                        file_diff = replace(file_diff, old_path=path)
                 patch = self.patch_gen.generate_patch_for_lines(file_diff, line_ranges)
 
                 if patch:
-                    if self.patch_gen.apply_patch(patch):
-                        changes_made = True
-                    else:
-                        # Patch failed - try copying specific lines only
-                        if self._copy_lines_from_source(path, source_branch, line_ranges):
-                            changes_made = True
-                        else:
-                            # If that also fails, raise an error - don't silently break separation
-                            raise ExecutionError(
-                                f"Failed to apply patch for {path} lines {line_ranges}. "
-                                "Line ranges may be incorrect or overlapping."
-                            )
+                    pending.append((path, line_ranges, patch))
             else:
                 # No diff info available - copy entire file
-                if self._copy_file_from_source(path, source_branch):
-                    changes_made = True
+                whole_files.append(path)
+
+        changes_made = self._copy_files_from_source(whole_files, source_branch)
+
+        # Old paths removed by the rename patches that applied
+        renamed_from: list[str] = []
+        applied = self.patch_gen.apply_patches([patch for _, _, patch in pending])
+        for (path, line_ranges, _), ok in zip(pending, applied):
+            if ok:
+                changes_made = True
+                if path in rename_sources:
+                    renamed_from.append(rename_sources[path])
+            # Patch failed - try copying specific lines only
+            elif self._copy_lines_from_source(path, source_branch, line_ranges):
+                changes_made = True
+            else:
+                # If that also fails, raise an error - don't silently break separation
+                raise ExecutionError(
+                    f"Failed to apply patch for {path} lines {line_ranges}. "
+                    "Line ranges may be incorrect or overlapping."
+                )
 
         if changes_made:
-            self.git.stage_all()
+            # Checkout already staged the whole files; only the patched or
+            # line-copied files need adding, so git skips scanning the rest
+            # of the worktree
+            self.git.stage_files([path for path, _, _ in pending] + renamed_from)
             commit_msg = f"{intent.name}\n\n{intent.description}"
             self.git.commit(commit_msg)
 
-    def _copy_file_from_source(self, path: str, source_branch: str) -> bool:
-        """Copy an entire file from the source branch."""
-        try:
-            subprocess.run(
-                ["git", "checkout", source_branch, "--", path],
-                cwd=self.git.repo_path,
-                check=True,
-                capture_output=True,
-            )
+    def _copy_files_from_source(self, paths: list[str], source_branch: str) -> bool:
+        """Copy entire files from the source branch, returning whether any was copied."""
+        if not paths:
+            return False
+
+        # One checkout covers every file. It fails as a whole if any path is
+        # missing on the source branch, so then retry the files one by one.
+        if self._checkout_from_source(paths, source_branch):
             return True
-        except subprocess.CalledProcessError:
+        if len(paths) == 1:
             return False
+        return any([self._checkout_from_source([path], source_branch) for path in paths])
+
+    def _checkout_from_source(self, paths: list[str], source_branch: str) -> bool:
+        """Check out paths from the source branch in a single git process."""
+        # Paths go through stdin rather than argv, so no ARG_MAX limit applies
+        result = subprocess.run(
+            [
+                "git", "--literal-pathspecs", "checkout", source_branch,
+                "--pathspec-from-file=-", "--pathspec-file-nul",
+            ],
+            cwd=self.git.repo_path,
+            input="\0".join(paths).encode("utf-8"),
+            capture_output=True,
+        )
+        return result.returncode == 0
 
     def _copy_lines_from_source(
         self,
@@ -240,98 +302,117 @@ class Executor:
         This is a fallback when patch application fails.
         """
         try:
-            # Get source file content
-            result = subprocess.run(
-                ["git", "show", f"{source_branch}:{path}"],
-                cwd=self.git.repo_path,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            source_lines = result.stdout.split("\n")
+            # Get source file content from the patch generator's long-lived
+            # cat-file process. Both sides stay bytes, so CRLF endings and
+            # non-UTF-8 content pass through untouched.
+            source = self.patch_gen.get_blob_at_ref(path, source_branch)
+            if source is None:
+                return False
 
             # Get current file content
             current_path = self.git.repo_path / path
             if current_path.exists():
-                with open(current_path, "r") as f:
-                    current_lines = f.read().split("\n")
+                current_lines = current_path.read_bytes().split(b"\n")
             else:
                 current_lines = []
 
-            # Determine which lines to copy from source
-            lines_to_copy: set[int] = set()
-            for start, end in line_ranges:
-                for line_num in range(start, end + 1):
-                    lines_to_copy.add(line_num)
-
-            # Build new content - extend current if source is longer
-            max_line = max(max(lines_to_copy), len(current_lines))
-            result_lines = [""] * max_line
-
-            # Start with current content
-            for i, line in enumerate(current_lines):
-                if i < max_line:
-                    result_lines[i] = line
-
-            # Overlay source lines for specified ranges
-            for line_num in lines_to_copy:
-                if line_num <= len(source_lines):
-                    # Line numbers are 1-indexed
-                    idx = line_num - 1
-                    if idx < len(source_lines):
-                        # Ensure result_lines is long enough
-                        while idx >= len(result_lines):
-                            result_lines.append("")
-                        result_lines[idx] = source_lines[idx]
+            # Line ranges to copy from source (1-indexed, inclusive)
+            ranges = [(start, end) for start, end in line_ranges if start <= end]
+            last_line = max(end for _, end in ranges)
+
+            # Index source line start offsets only up to the last requested
+            # line, so the rest of the file is never scanned or split
+            line_starts = [0]
+            newline = source.find(b"\n")
+            while newline != -1 and len(line_starts) <= last_line:
+                line_starts.append(newline + 1)
+                newline = source.find(b"\n", newline + 1)
+            # Exact line count if the scan hit the end, otherwise past last_line
+            source_line_count = len(line_starts)
+
+            # Build new content from the current lines, extended with empty
+            # lines if a range reaches past the end of the file
+            max_line = max(last_line, len(current_lines))
+            result_lines = current_lines + [b""] * (max_line - len(current_lines))
+
+            # Overlay source lines for specified ranges, one slice per range
+            for start, end in ranges:
+                start = max(start, 1)
+                end = min(end, source_line_count)
+                if start <= end:
+                    stop = line_starts[end] - 1 if end < source_line_count else len(source)
+                    result_lines[start - 1:end] = source[line_starts[start - 1]:stop].split(b"\n")
 
             # Write the result
-            with open(current_path, "w") as f:
-                f.write("\n".join(result_lines))
+            current_path.write_bytes(b"\n".join(result_lines))
 
             return True
 
-        except (subprocess.CalledProcessError, IOError):
+        except OSError:
             return False
 
-    def _push_and_create_pr(
+    def _push_and_create_prs(
         self,
-        intent: Intent,
-        branch_name: str,
-        base_branch: str,
+        pending_prs: list[tuple[int, Intent, str, str]],
     ) -> None:
-        """Push branch and create PR."""
-        try:
-            self.git.push_branch(branch_name)
-
-            result = subprocess.run(
-                [
-                    "gh", "pr", "create",
-                    "--title", intent.name,
-                    "--body", intent.description or "Created by gitsplit",
-                    "--base", base_branch,
-                    "--head", branch_name,
-                ],
-                cwd=self.git.repo_path,
-                capture_output=True,
-                text=True,
+        """Push all intent branches and create their stacked PRs."""
+        self.git.push_branches([branch_name for _, _, branch_name, _ in pending_prs])
+
+        result = subprocess.run(
+            ["gh", "repo", "view", "--json", "id", "--jq", ".id"],
+            cwd=self.git.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return
+
+        # One GraphQL document creates every PR: an aliased createPullRequest
+        # per intent, with all user text passed as variables
+        params = ["$repo: ID!"]
+        mutations = []
+        args = ["gh", "api", "graphql", "-f", f"repo={result.stdout.strip()}"]
+        for k, (_, intent, branch_name, base_branch) in enumerate(pending_prs):
+            params.append(f"$title{k}: String!, $body{k}: String!, $base{k}: String!, $head{k}: String!")
+            mutations.append(
+                f"pr{k}: createPullRequest(input: {{repositoryId: $repo, title: $title{k}, "
+                f"body: $body{k}, baseRefName: $base{k}, headRefName: $head{k}}}) "
+                "{ pullRequest { number url } }"
             )
+            args += [
+                "-f", f"title{k}={intent.name}",
+                "-f", f"body{k}={intent.description or 'Created by gitsplit'}",
+                "-f", f"base{k}={base_branch}",
+                "-f", f"head{k}={branch_name}",
+            ]
+        args += ["-f", f"query=mutation({', '.join(params)}) {{ {' '.join(mutations)} }}"]
+
+        result = subprocess.run(
+            args,
+            cwd=self.git.repo_path,
+            capture_output=True,
+            text=True,
+        )
 
-            if result.returncode == 0:
-                pr_url = result.stdout.strip()
-                intent.pr_url = pr_url
+        # If some PRs fail, gh exits non-zero but still prints the ones created
+        try:
+            data = json.loads(result.stdout).get("data") or {}
+        except ValueError:
+            return
 
-                match = re.search(r"/pull/(\d+)", pr_url)
-                if match:
-                    intent.pr_number = int(match.group(1))
+        for k, (_, intent, branch_name, _) in enumerate(pending_prs):
+            pr = (data.get(f"pr{k}") or {}).get("pullRequest")
+            if not pr:
+                continue
 
-                self.session.created_prs.append({
-                    "branch": branch_name,
-                    "pr_number": intent.pr_number,
-                    "pr_url": pr_url,
-                })
+            intent.pr_url = pr["url"]
+            intent.pr_number = pr["number"]
 
-        except subprocess.CalledProcessError:
-            pass
+            self.session.created_prs.append({
+                "branch": branch_name,
+                "pr_number": intent.pr_number,
+                "pr_url": intent.pr_url,
+            })
 
     def _cleanup_branches(self, branches: list[str]) -> None:
         """Clean up created branches on failure."""
@@ -342,11 +423,10 @@ class Executor:
         except GitError:
             pass
 
-        for branch in branches:
-            try:
-                self.git.delete_branch(branch, force=True)
-            except GitError:
-                pass
+        try:
+            self.git.delete_branches(branches, force=True)
+        except GitError:
+            pass
 
     def rebuild_from_plan(
         self,
@@ -362,13 +442,17 @@ class Executor:
                 start_idx = execution_order.index(starting_from)
                 execution_order = execution_order[start_idx:]
 
+                intents_by_id = {i.id: i for i in plan.intents}
+                stale_branches = []
                 for intent_id in execution_order:
-                    intent = next((i for i in plan.intents if i.id == intent_id), None)
+                    intent = intents_by_id.get(intent_id)
                     if intent and intent.branch_name:
-                        try:
-                            self.git.delete_branch(intent.branch_name, force=True)
-                        except GitError:
-                            pass
+                        stale_branches.append(intent.branch_name)
+
+                try:
+                    self.git.delete_branches(stale_branches, force=True)
+                except GitError:
+                    pass
 
             except ValueError:
                 pass
@@ -11,6 +11,23 @@ from gitsplit.models import (
     Session,
 )
 
+# Diffs longer than this are cut down to their head and tail before being
+# sent to the AI, to bound the prompt size on very large changes
+_MAX_DIFF_CHARS = 60_000
+
+
+def _truncate_diff(diff: str) -> str:
+    """Cut the middle out of a diff longer than _MAX_DIFF_CHARS."""
+    if len(diff) <= _MAX_DIFF_CHARS:
+        return diff
+
+    # Keep half the budget from each end, cut on line boundaries
+    keep = _MAX_DIFF_CHARS // 2
+    head_end = diff.rfind("\n", 0, keep) + 1 or keep
+    tail_start = diff.find("\n", len(diff) - keep) + 1 or len(diff) - keep
+    omitted = tail_start - head_end
+    return f"{diff[:head_end]}... [truncated {omitted} chars] ...\n{diff[tail_start:]}"
+
 
 class PlanningError(Exception):
     """Change planning failed."""
@@ -25,6 +42,8 @@ class ChangePlanner:
         self.git = git
         self.ai = ai
         self.session = session
+        # Prompt diff for the last (base branch, HEAD sha) it was built for
+        self._diff_cache: tuple[tuple[str | None, str], str] | None = None
 
     def plan(self, intents: list[Intent]) -> ChangePlan:
         """
@@ -39,7 +58,7 @@ class ChangePlanner:
             raise PlanningError("No intents provided")
 
         # Get the diff for reference
-        diff = self.git.get_raw_diff(self.session.base_branch)
+        diff = self._get_prompt_diff()
 
         # Build context for AI - this continues the conversation from discovery
         context = self._build_context(intents, diff)
@@ -55,6 +74,7 @@ class ChangePlanner:
                 temperature=0.0,
                 max_tokens=8192,
                 use_conversation=True,
+                validate=parse_json_response,
             )
         except AIError as e:
             raise PlanningError(f"AI planning failed: {e}")
@@ -70,8 +90,7 @@ class ChangePlanner:
 
         # Update session
         self.session.change_plan = plan
-        self.session.total_tokens_used += response.input_tokens + response.output_tokens
-        self.session.total_cost += response.cost
+        self.session.add_usage(response)
 
         return plan
 
@@ -92,6 +111,7 @@ class ChangePlanner:
                 temperature=0.0,
                 max_tokens=8192,
                 use_conversation=True,
+                validate=parse_json_response,
             )
         except AIError as e:
             raise PlanningError(f"AI planning failed on retry: {e}")
@@ -104,11 +124,18 @@ class ChangePlanner:
         plan = self._build_plan(intents, result)
 
         self.session.change_plan = plan
-        self.session.total_tokens_used += response.input_tokens + response.output_tokens
-        self.session.total_cost += response.cost
+        self.session.add_usage(response)
 
         return plan
 
+    def _get_prompt_diff(self) -> str:
+        """Get the diff to show the AI, reused until HEAD moves."""
+        key = (self.session.base_branch, self.git.repo.head.commit.hexsha)
+        if self._diff_cache is None or self._diff_cache[0] != key:
+            diff = self.git.get_raw_diff(self.session.base_branch)
+            self._diff_cache = (key, _truncate_diff(diff))
+        return self._diff_cache[1]
+
     def _build_context(self, intents: list[Intent], diff: str) -> str:
         """Build context message for AI."""
         parts = []
@@ -144,13 +171,14 @@ class ChangePlanner:
         """Build ChangePlan from AI response."""
         # Process dependencies
         dependencies = result.get("dependencies", [])
+        intents_by_id = {intent.id: intent for intent in intents}
         for dep in dependencies:
             from_id = dep.get("from")
             to_id = dep.get("to")
             if from_id and to_id:
-                for intent in intents:
-                    if intent.id == from_id and to_id not in intent.dependencies:
-                        intent.dependencies.append(to_id)
+                intent = intents_by_id.get(from_id)
+                if intent and to_id not in intent.dependencies:
+                    intent.dependencies.append(to_id)
 
         # Process execution order
         execution_order = result.get("execution_order", [i.id for i in intents])
@@ -174,10 +202,8 @@ class ChangePlanner:
                     lines = shared.get("lines", [0, 0])
                     line_range = LineRange(lines[0], lines[1]) if len(lines) >= 2 else LineRange(0, 0)
 
-                    # Create overlap tuples
-                    overlaps = []
-                    for i in range(len(shared_by) - 1):
-                        overlaps.append((shared_by[i], shared_by[i + 1], line_range))
+                    # Create overlap tuples between consecutive sharers
+                    overlaps = [(a, b, line_range) for a, b in zip(shared_by, shared_by[1:])]
 
                     conflict = MultiIntentConflict(
                         file_path=path,
@@ -212,7 +238,7 @@ class ChangePlanner:
             Updated change plan
         """
         intents = self.session.confirmed_intents
-        diff = self.git.get_raw_diff(self.session.base_branch)
+        diff = self._get_prompt_diff()
 
         # Build context with error information
         context = self._build_replan_context(intents, diff, preserved_files, error_context)
@@ -224,6 +250,7 @@ class ChangePlanner:
                 temperature=0.0,
                 max_tokens=8192,
                 use_conversation=True,
+                validate=parse_json_response,
             )
         except AIError as e:
             raise PlanningError(f"AI planning failed: {e}")
@@ -238,8 +265,7 @@ class ChangePlanner:
 
         # Update session
         self.session.change_plan = plan
-        self.session.total_tokens_used += response.input_tokens + response.output_tokens
-        self.session.total_cost += response.cost
+        self.session.add_usage(response)
 
         return plan
 
@@ -1,13 +1,16 @@
 """Session persistence for gitsplit."""
 
 import json
+import os
 import uuid
-from dataclasses import asdict, field
+from dataclasses import fields
 from datetime import datetime
+from operator import attrgetter
 from pathlib import Path
 from typing import Any
 
 from gitsplit.models import (
+    SESSIONS_DIR,
     Session,
     SessionPhase,
     Intent,
@@ -20,7 +23,22 @@ from gitsplit.models import (
 )
 
 
-SESSIONS_DIR = Path.home() / ".gitsplit" / "sessions"
+# Enum members by stored value; indexing a dict skips Enum's call machinery
+_PHASES = {phase.value: phase for phase in SessionPhase}
+_STRATEGIES = {strategy.value: strategy for strategy in ResolutionStrategy}
+
+# Session fields stored as-is: every init field except those with their own
+# encoding below. New plain fields are saved and loaded without code changes.
+_SESSION_ENCODED_FIELDS = frozenset(
+    {"phase", "discovered_intents", "confirmed_intents", "change_plan", "backtracks"}
+)
+_SESSION_PLAIN_FIELDS = tuple(
+    f.name for f in fields(Session) if f.init and f.name not in _SESSION_ENCODED_FIELDS
+)
+_get_session_plain_values = attrgetter(*_SESSION_PLAIN_FIELDS)
+
+# Suffix of the per-session summary file (id, branch, phase) used for listing
+_META_SUFFIX = ".meta"
 
 
 def ensure_sessions_dir() -> None:
@@ -61,17 +79,16 @@ def _serialize_intent(intent: Intent) -> dict[str, Any]:
 
 def _deserialize_intent(data: dict[str, Any]) -> Intent:
     """Deserialize an Intent from a dict."""
-    files = []
-    for f in data.get("files", []):
-        files.append(
-            FileChange(
-                path=f["path"],
-                line_ranges=[LineRange(lr[0], lr[1]) for lr in f.get("line_ranges", [])],
-                is_entire_file=f.get("is_entire_file", False),
-                additions=f.get("additions", 0),
-                deletions=f.get("deletions", 0),
-            )
+    files = [
+        FileChange(
+            path=f["path"],
+            line_ranges=[LineRange(lr[0], lr[1]) for lr in f.get("line_ranges", [])],
+            is_entire_file=f.get("is_entire_file", False),
+            additions=f.get("additions", 0),
+            deletions=f.get("deletions", 0),
         )
+        for f in data.get("files", [])
+    ]
 
     return Intent(
         id=data["id"],
@@ -119,26 +136,24 @@ def _deserialize_change_plan(data: dict[str, Any] | None) -> ChangePlan | None:
 
     intents = [_deserialize_intent(i) for i in data.get("intents", [])]
 
-    conflicts = []
-    for c in data.get("conflicts", []):
-        overlapping_ranges = []
-        for r in c.get("overlapping_ranges", []):
-            overlapping_ranges.append((r[0], r[1], LineRange(r[2][0], r[2][1])))
-
-        conflicts.append(
-            MultiIntentConflict(
-                file_path=c["file_path"],
-                intent_ids=c["intent_ids"],
-                overlapping_ranges=overlapping_ranges,
-                suggested_strategy=ResolutionStrategy(c["suggested_strategy"]),
-                resolved=c.get("resolved", False),
-                chosen_strategy=(
-                    ResolutionStrategy(c["chosen_strategy"])
-                    if c.get("chosen_strategy")
-                    else None
-                ),
-            )
+    conflicts = [
+        MultiIntentConflict(
+            file_path=c["file_path"],
+            intent_ids=c["intent_ids"],
+            overlapping_ranges=[
+                (r[0], r[1], LineRange(r[2][0], r[2][1]))
+                for r in c.get("overlapping_ranges", [])
+            ],
+            suggested_strategy=_STRATEGIES[c["suggested_strategy"]],
+            resolved=c.get("resolved", False),
+            chosen_strategy=(
+                _STRATEGIES[c["chosen_strategy"]]
+                if c.get("chosen_strategy")
+                else None
+            ),
         )
+        for c in data.get("conflicts", [])
+    ]
 
     return ChangePlan(
         intents=intents,
@@ -163,8 +178,8 @@ def _serialize_backtrack(backtrack: BacktrackInfo) -> dict[str, Any]:
 def _deserialize_backtrack(data: dict[str, Any]) -> BacktrackInfo:
     """Deserialize a BacktrackInfo from a dict."""
     return BacktrackInfo(
-        from_phase=SessionPhase(data["from_phase"]),
-        to_phase=SessionPhase(data["to_phase"]),
+        from_phase=_PHASES[data["from_phase"]],
+        to_phase=_PHASES[data["to_phase"]],
         reason=data["reason"],
         attempt=data["attempt"],
         preserved_intents=data.get("preserved_intents", []),
@@ -174,69 +189,86 @@ def _deserialize_backtrack(data: dict[str, Any]) -> BacktrackInfo:
 
 def serialize_session(session: Session) -> dict[str, Any]:
     """Serialize a Session to a dict for JSON storage."""
-    return {
-        "id": session.id,
-        "branch": session.branch,
-        "base_branch": session.base_branch,
-        "phase": session.phase.value,
-        "original_tree_hash": session.original_tree_hash,
-        "discovered_intents": [_serialize_intent(i) for i in session.discovered_intents],
-        "confirmed_intents": [_serialize_intent(i) for i in session.confirmed_intents],
-        "change_plan": _serialize_change_plan(session.change_plan),
-        "created_branches": session.created_branches,
-        "created_prs": session.created_prs,
-        "backtracks": [_serialize_backtrack(b) for b in session.backtracks],
-        "current_attempt": session.current_attempt,
-        "max_attempts": session.max_attempts,
-        "total_tokens_used": session.total_tokens_used,
-        "total_cost": session.total_cost,
-        "max_cost": session.max_cost,
-        "auto_mode": session.auto_mode,
-        "auto_hint": session.auto_hint,
-        "babysit_mode": session.babysit_mode,
-        "dry_run": session.dry_run,
-        "verbose": session.verbose,
-        "no_verify_build": session.no_verify_build,
-        "no_pr": session.no_pr,
-    }
+    data = dict(zip(_SESSION_PLAIN_FIELDS, _get_session_plain_values(session)))
+    data["phase"] = session.phase.value
+    data["discovered_intents"] = [_serialize_intent(i) for i in session.discovered_intents]
+    data["confirmed_intents"] = [_serialize_intent(i) for i in session.confirmed_intents]
+    data["change_plan"] = _serialize_change_plan(session.change_plan)
+    data["backtracks"] = [_serialize_backtrack(b) for b in session.backtracks]
+    return data
 
 
 def deserialize_session(data: dict[str, Any]) -> Session:
     """Deserialize a Session from a dict."""
+    # Plain fields missing from older files take the dataclass defaults
     return Session(
-        id=data["id"],
-        branch=data["branch"],
-        base_branch=data["base_branch"],
-        phase=SessionPhase(data["phase"]),
-        original_tree_hash=data.get("original_tree_hash", ""),
+        phase=_PHASES[data["phase"]],
         discovered_intents=[_deserialize_intent(i) for i in data.get("discovered_intents", [])],
         confirmed_intents=[_deserialize_intent(i) for i in data.get("confirmed_intents", [])],
         change_plan=_deserialize_change_plan(data.get("change_plan")),
-        created_branches=data.get("created_branches", []),
-        created_prs=data.get("created_prs", []),
         backtracks=[_deserialize_backtrack(b) for b in data.get("backtracks", [])],
-        current_attempt=data.get("current_attempt", 1),
-        max_attempts=data.get("max_attempts", 5),
-        total_tokens_used=data.get("total_tokens_used", 0),
-        total_cost=data.get("total_cost", 0.0),
-        max_cost=data.get("max_cost"),
-        auto_mode=data.get("auto_mode", False),
-        auto_hint=data.get("auto_hint", ""),
-        babysit_mode=data.get("babysit_mode", False),
-        dry_run=data.get("dry_run", False),
-        verbose=data.get("verbose", False),
-        no_verify_build=data.get("no_verify_build", False),
-        no_pr=data.get("no_pr", False),
+        **{name: data[name] for name in _SESSION_PLAIN_FIELDS if name in data},
     )
 
 
-def save_session(session: Session) -> Path:
-    """Save a session to disk."""
+def _meta_path(path: Path) -> Path:
+    """Get the path of the summary file kept beside a session file."""
+    return path.with_suffix(_META_SUFFIX)
+
+
+def _read_meta(path: Path) -> dict[str, Any] | None:
+    """Read the summary for a session file, or None if it has none."""
+    try:
+        return json.loads(_meta_path(path).read_bytes())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_atomic(path: Path, data: bytes, durable: bool) -> None:
+    """Replace a file's content so it is never seen half-written."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if durable:
+            f.flush()
+            # On disk before the rename, so a crash can't leave an empty file
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def encode_session(session: Session) -> bytes:
+    """Encode a Session exactly as save_session writes it."""
+    # Compact output keeps json on its C encoder (indent forces the Python one)
+    return json.dumps(serialize_session(session), separators=(",", ":")).encode("utf-8")
+
+
+def save_session(
+    session: Session, durable: bool = False, encoded: bytes | None = None
+) -> Path:
+    """
+    Save a session to disk.
+
+    The write is always atomic; durable also flushes it to the device, which
+    is only worth its cost for saves that must survive a system crash. Pass
+    encoded when the caller already has encode_session's output.
+    """
     ensure_sessions_dir()
-    path = SESSIONS_DIR / f"{session.id}.json"
+    path = session.get_session_path()
 
-    with open(path, "w") as f:
-        json.dump(serialize_session(session), f, indent=2)
+    _write_atomic(
+        path,
+        encoded if encoded is not None else encode_session(session),
+        durable,
+    )
+    # Small summary so listing and branch lookups need not parse the session
+    _write_atomic(
+        _meta_path(path),
+        json.dumps(
+            {"id": session.id, "branch": session.branch, "phase": session.phase.value},
+            separators=(",", ":"),
+        ).encode("utf-8"),
+        durable,
+    )
 
     return path
 
@@ -248,33 +280,37 @@ def load_session(session_id: str) -> Session | None:
     if not path.exists():
         return None
 
-    with open(path, "r") as f:
-        data = json.load(f)
+    return deserialize_session(json.loads(path.read_bytes()))
 
-    return deserialize_session(data)
+
+def _session_file_names() -> list[str]:
+    """List session file names; scandir gives names without a stat per entry."""
+    with os.scandir(SESSIONS_DIR) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(".json")]
 
 
 def find_latest_session(branch: str | None = None) -> Session | None:
     """Find the most recent session, optionally filtered by branch."""
     ensure_sessions_dir()
 
-    sessions = []
-    for path in SESSIONS_DIR.glob("*.json"):
-        try:
-            with open(path, "r") as f:
-                data = json.load(f)
+    # Newest first by session ID (which starts with timestamp), so only files
+    # up to the first match are read and parsed
+    for name in sorted(_session_file_names(), reverse=True):
+        path = SESSIONS_DIR / name
+        if branch is not None:
+            meta = _read_meta(path)
+            if meta is not None and meta.get("branch") != branch:
+                continue
 
-            if branch is None or data.get("branch") == branch:
-                sessions.append((path.stem, data))
-        except (json.JSONDecodeError, KeyError):
+        try:
+            data = json.loads(path.read_bytes())
+        except json.JSONDecodeError:
             continue
 
-    if not sessions:
-        return None
+        if branch is None or data.get("branch") == branch:
+            return deserialize_session(data)
 
-    # Sort by session ID (which starts with timestamp)
-    sessions.sort(key=lambda x: x[0], reverse=True)
-    return deserialize_session(sessions[0][1])
+    return None
 
 
 def delete_session(session_id: str) -> bool:
@@ -283,6 +319,7 @@ def delete_session(session_id: str) -> bool:
 
     if path.exists():
         path.unlink()
+        _meta_path(path).unlink(missing_ok=True)
         return True
     return False
 
@@ -292,10 +329,11 @@ def list_sessions() -> list[dict[str, Any]]:
     ensure_sessions_dir()
 
     sessions = []
-    for path in SESSIONS_DIR.glob("*.json"):
+    for name in _session_file_names():
+        path = SESSIONS_DIR / name
         try:
-            with open(path, "r") as f:
-                data = json.load(f)
+            # Sessions saved before summaries existed are parsed in full
+            data = _read_meta(path) or json.loads(path.read_bytes())
 
             sessions.append({
                 "id": data["id"],
@@ -1,13 +1,50 @@
 """Hash verification for gitsplit - The Golden Rule."""
 
+import ast
+import os
+import re
+import shlex
+import shutil
 import subprocess
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Any
 
 from gitsplit.git import GitOperations, GitError
 from gitsplit.models import VerificationResult
 
+# Old-file start line of a hunk header: @@ -start,count +start,count @@
+_HUNK_START_RE = re.compile(r"@@ -(\d+)")
+
+# Hunks recorded before the diff is abandoned; this many already puts a failure
+# in diagnose_failure's highest severity, so more would not change the outcome
+_MAX_DIFFERENCES = 64
+
+# Build commands tried in order when none is given
+_BUILD_COMMANDS = (
+    ["npm", "run", "build"],
+    ["make"],
+    ["cargo", "build"],
+    ["go", "build", "./..."],
+)
+
+# Directories never searched for Python files, besides hidden ones
+_SKIP_DIRS = frozenset({"venv", "node_modules", "__pycache__"})
+
+
+def _check_file_syntax(path: str) -> str | None:
+    """Parse one Python file, returning an error message if it fails."""
+    name = os.path.basename(path)
+    try:
+        # Use ast.parse instead of py_compile to avoid creating .pyc files
+        with open(path, "r") as f:
+            source = f.read()
+        ast.parse(source, filename=path)
+    except SyntaxError as e:
+        return f"{name}: {e.msg} at line {e.lineno}"
+    except Exception as e:
+        return f"{name}: {str(e)}"
+    return None
+
 
 class VerificationError(Exception):
     """Verification operation failed."""
@@ -20,6 +57,12 @@ class Verifier:
 
     def __init__(self, git: GitOperations):
         self.git = git
+        # Content hash per tree hash; a tree's content never changes, so the
+        # ls-tree walk is done once per tree however many refs point at it
+        self._content_hashes: dict[str, str] = {}
+        # Syntax check result per file path, with the stat signature it was
+        # computed for; intermediate builds re-check mostly unchanged trees
+        self._syntax_cache: dict[str, tuple[tuple[int, int, int, int], str | None]] = {}
 
     def get_tree_hash(self, ref: str = "HEAD") -> str:
         """Get the tree hash for a ref."""
@@ -27,7 +70,15 @@ class Verifier:
 
     def get_content_hash(self, ref: str = "HEAD") -> str:
         """Get the content hash for a ref."""
-        return self.git.get_content_hash(ref)
+        return self._get_content_hashes([ref])[0]
+
+    def _get_content_hashes(self, refs: list[str]) -> list[str]:
+        """Get the content hash for each ref, resolving all trees in one git call."""
+        trees = self.git.get_tree_hashes(refs)
+        for tree in trees:
+            if tree not in self._content_hashes:
+                self._content_hashes[tree] = self.git.get_content_hash(tree)
+        return [self._content_hashes[tree] for tree in trees]
 
     def verify_split(
         self,
@@ -40,8 +91,7 @@ class Verifier:
         The Golden Rule: Hash(Original Code) must equal Hash(Final Split Code).
         """
         try:
-            original_hash = self.get_content_hash(original_ref)
-            final_hash = self.get_content_hash(split_tip_ref)
+            original_hash, final_hash = self._get_content_hashes([original_ref, split_tip_ref])
 
             if original_hash == final_hash:
                 return VerificationResult(
@@ -71,54 +121,66 @@ class Verifier:
         """Find detailed differences between two refs."""
         differences = []
 
-        try:
-            # Get diff between the two refs
-            result = subprocess.run(
-                ["git", "diff", original_ref, split_tip_ref],
-                cwd=self.git.repo_path,
-                capture_output=True,
-                text=True,
-            )
-
-            if result.returncode == 0 and result.stdout:
-                # Parse the diff to find specific differences
-                current_file = None
-                for line in result.stdout.split("\n"):
-                    if line.startswith("diff --git"):
-                        # Extract file path
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            current_file = parts[3][2:]  # Remove 'b/' prefix
-
-                    elif line.startswith("@@") and current_file:
-                        # Parse hunk header for line numbers
-                        # Format: @@ -start,count +start,count @@
-                        import re
-                        match = re.search(r"@@ -(\d+)", line)
-                        if match:
-                            line_num = int(match.group(1))
-                            differences.append({
-                                "file": current_file,
-                                "line": line_num,
-                                "description": f"Difference at line {line_num}",
-                            })
-
-                    elif current_file and (line.startswith("+") or line.startswith("-")):
-                        if not line.startswith("+++") and not line.startswith("---"):
-                            # Record the actual difference
-                            change_type = "added" if line.startswith("+") else "removed"
-                            content = line[1:].strip()[:50]  # First 50 chars
-                            if differences and differences[-1]["file"] == current_file:
+        # Stream the diff rather than holding all of it; -U0 leaves out the
+        # context lines, which are never recorded
+        with subprocess.Popen(
+            ["git", "diff", "-U0", original_ref, split_tip_ref],
+            cwd=self.git.repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            errors="replace",
+        ) as proc:
+            # Parse the diff to find specific differences
+            current_file = None
+            truncated = False
+            for line in proc.stdout:
+                line = line.rstrip("\n")
+                # Classify by first character; changed lines, the bulk of a
+                # diff, are tested first
+                kind = line[:1]
+                if kind == "+" or kind == "-":
+                    if current_file and line[:3] != "+++" and line[:3] != "---":
+                        # Record the actual difference
+                        change_type = "added" if kind == "+" else "removed"
+                        content = line[1:].strip()[:50]  # First 50 chars
+                        if differences:
+                            last = differences[-1]
+                            if last["file"] == current_file:
                                 # Update existing entry
-                                if "changes" not in differences[-1]:
-                                    differences[-1]["changes"] = []
-                                differences[-1]["changes"].append({
+                                last.setdefault("changes", []).append({
                                     "type": change_type,
                                     "content": content,
                                 })
 
-        except subprocess.CalledProcessError:
-            pass
+                elif kind == "@":
+                    if not line.startswith("@@") or not current_file:
+                        continue
+                    if len(differences) >= _MAX_DIFFERENCES:
+                        # Enough to diagnose; stop git instead of reading the rest
+                        truncated = True
+                        proc.kill()
+                        break
+
+                    # Parse hunk header for line numbers
+                    match = _HUNK_START_RE.match(line)
+                    if match:
+                        line_num = int(match.group(1))
+                        differences.append({
+                            "file": current_file,
+                            "line": line_num,
+                            "description": f"Difference at line {line_num}",
+                        })
+
+                elif kind == "d" and line.startswith("diff --git"):
+                    # Extract file path
+                    parts = line.split()
+                    if len(parts) >= 4:
+                        current_file = parts[3][2:]  # Remove 'b/' prefix
+
+        # A failed diff (e.g. an unknown ref) reports no differences
+        if proc.returncode != 0 and not truncated:
+            return []
 
         return differences
 
@@ -209,11 +271,13 @@ class Verifier:
             if python_check is not None:
                 return python_check
 
-            # Try common build commands
-            for cmd in ["npm run build", "make", "cargo build", "go build ./..."]:
+            # Try common build commands whose tool is installed
+            for argv in _BUILD_COMMANDS:
+                if shutil.which(argv[0]) is None:
+                    continue
                 try:
                     result = subprocess.run(
-                        cmd.split(),
+                        argv,
                         cwd=self.git.repo_path,
                         capture_output=True,
                         text=True,
@@ -228,10 +292,10 @@ class Verifier:
             # No build command found or all failed
             return True, "No build command found - skipping build verification"
 
-        # User provided a build command
+        # User provided a build command; shlex keeps quoted arguments whole
         try:
             result = subprocess.run(
-                build_command.split(),
+                shlex.split(build_command),
                 cwd=self.git.repo_path,
                 capture_output=True,
                 text=True,
@@ -241,36 +305,79 @@ class Verifier:
 
         except subprocess.TimeoutExpired:
             return False, "Build timed out"
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, ValueError) as e:
             return False, str(e)
 
+    def _find_python_files(self) -> list[str]:
+        """List Python files to syntax-check, skipping hidden and non-source dirs."""
+        repo_path = str(self.git.repo_path)
+
+        # Tracked files come from the index; --others adds untracked files
+        # that are not ignored, so new unstaged sources are still checked
+        try:
+            result = subprocess.run(
+                [
+                    "git", "ls-files", "-z", "--cached", "--others",
+                    "--exclude-standard", "--", "*.py",
+                ],
+                cwd=repo_path,
+                capture_output=True,
+                check=True,
+            )
+        except (subprocess.CalledProcessError, OSError):
+            result = None
+
+        if result is not None:
+            paths = []
+            for raw in result.stdout.split(b"\0"):
+                if not raw:
+                    continue
+                rel = os.fsdecode(raw)
+                if any(part.startswith(".") or part in _SKIP_DIRS for part in rel.split("/")):
+                    continue
+                paths.append(os.path.join(repo_path, rel))
+            return paths
+
+        # Not usable as a git checkout: walk the tree, pruning skipped
+        # directories so they are never listed at all
+        paths = []
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d not in _SKIP_DIRS]
+            paths.extend(
+                os.path.join(root, name)
+                for name in files
+                if name.endswith(".py") and not name.startswith(".")
+            )
+        return paths
+
     def _check_python_syntax(self) -> tuple[bool, str] | None:
         """Check Python file syntax if any .py files exist."""
-        import ast
-        repo_path = Path(self.git.repo_path)
-
-        # Find all Python files
-        py_files = list(repo_path.glob("**/*.py"))
-        if not py_files:
+        paths = self._find_python_files()
+        if not paths:
             return None  # No Python files
 
-        errors = []
-        for py_file in py_files:
-            # Skip hidden directories and common non-source directories
-            if any(part.startswith(".") or part in ("venv", "node_modules", "__pycache__")
-                   for part in py_file.parts):
-                continue
-
+        # Reuse results for files whose stat signature is unchanged
+        errors_by_path: dict[str, str | None] = {}
+        signatures: dict[str, tuple[int, int, int, int]] = {}
+        for path in paths:
             try:
-                # Use ast.parse instead of py_compile to avoid creating .pyc files
-                with open(py_file, "r") as f:
-                    source = f.read()
-                ast.parse(source, filename=str(py_file))
-            except SyntaxError as e:
-                errors.append(f"{py_file.name}: {e.msg} at line {e.lineno}")
-            except Exception as e:
-                errors.append(f"{py_file.name}: {str(e)}")
-
+                st = os.stat(path)
+            except OSError:
+                continue  # Parsing reports the error
+            signature = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+            cached = self._syntax_cache.get(path)
+            if cached is not None and cached[0] == signature:
+                errors_by_path[path] = cached[1]
+            else:
+                signatures[path] = signature
+        stale = [path for path in paths if path not in errors_by_path]
+
+        for path, error in zip(stale, map(_check_file_syntax, stale)):
+            errors_by_path[path] = error
+            if path in signatures:
+                self._syntax_cache[path] = (signatures[path], error)
+
+        errors = [error for error in map(errors_by_path.get, paths) if error is not None]
         if errors:
             return False, "Python syntax errors:\n" + "\n".join(errors)
 